@@ -1,29 +1,52 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, chatbot
-from app.utils.database import engine, Base
-from app.models import user
-from pydantic import BaseModel
+from app.utils.database import engine, Base, add_missing_columns
+from app.models import user, donor
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
+import json
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from .services.blood_service import BloodBankService
 from .services.chatbot_service import AIChatbotService, BloodRequest, UrgencyLevel
 from .services.donor_service import DonorService
+from .utils.compression import CompressionMiddleware
+from .utils.http_cache import CachedRepresentation, etag_matches, not_modified, validator_headers, weak_etag
+from .utils.responses import FastJSONResponse, FastJSONRoute
+from .utils.payloads import (
+    InvalidCursor, compact_donor_match, cursor_after, encode_cursor, parse_fields, project,
+    query_fingerprint, shape_availability
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
+# Create database tables, and add columns that older databases lack
 Base.metadata.create_all(bind=engine)
+for table in Base.metadata.sorted_tables:
+    add_missing_columns(engine, table)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # eRaktKosh discovery runs in the background so startup never waits on the portal
+    blood_service.start_background_tasks()
+    yield
+    await blood_service.stop_background_tasks()
 
 app = FastAPI(
     title="ThalAssist+ API", 
     version="2.0.0",
-    description="API for Thalassemia patient support with blood bank search and chatbot"
+    description="API for Thalassemia patient support with blood bank search and chatbot",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
+# Serialize response_model-less endpoints with orjson directly, skipping jsonable_encoder
+app.router.route_class = FastJSONRoute
 
 
 # Add CORS middleware for frontend
@@ -34,6 +57,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# gzip (or brotli, when installed) for bodies of 1 KiB and up
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
 
 # Include routers
 app.include_router(auth.router)
@@ -71,23 +96,43 @@ class BloodRequestModel(BaseModel):
     patient_age: Optional[int] = None
     units_needed: Optional[int] = None
 
+class AvailabilityQuery(BaseModel):
+    state: str
+    district: str
+    blood_group: str
+    component: str = "Whole Blood"
+
+class BatchAvailabilityRequest(BaseModel):
+    queries: List[AvailabilityQuery] = Field(..., min_length=1, max_length=100)
+    include_compatible: bool = False
+
+class DonorStatusUpdate(BaseModel):
+    status: Optional[str] = None  # available / not_available
+    verified: Optional[bool] = None
+
 class DonorEngagementRequest(BaseModel):
     donor_id: Optional[str] = None
     location: Optional[str] = None
     blood_type: Optional[str] = None
 
-@app.get("/")
-def read_root():
-    return {
-        "message": "Welcome to ThalAssist+ API",
-        "endpoints": {
-            "blood_availability": "/blood-availability",
-            "chat": "/chat",
-            "donor_match": "/donor-match",
-            "health": "/health",
-            "debug": "/debug/eraktkosh-connectivity"
-        }
+root_representation = CachedRepresentation(lambda: {
+    "message": "Welcome to ThalAssist+ API",
+    "endpoints": {
+        "blood_availability": "/blood-availability",
+        "blood_availability_batch": "/blood-availability/batch",
+        "blood_availability_stream": "/blood-availability/stream",
+        "chat": "/chat",
+        "donor_match": "/donor-match",
+        "donor_match_phenotype": "/donor-match/phenotype",
+        "donor_statistics": "/donor-statistics",
+        "health": "/health",
+        "debug": "/debug/eraktkosh-connectivity"
     }
+})
+
+@app.get("/")
+def read_root(request: Request):
+    return root_representation.respond(request)
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -101,19 +146,88 @@ async def health_check():
             "emergency_system": "active",
             "donor_engagement": "active",
             "faq_handling": "active"
-        }
+        },
+        "eraktkosh_mirror": blood_service.discovery.health.value
     }
 
 # Blood availability endpoints
 @app.get("/blood-availability")
 def blood_availability(
+    request: Request,
+    blood_group: str = Query(..., description="Blood group (A+, B+, etc.)"),
+    state: Optional[str] = Query(default=None, description="State name (e.g., Tamil Nadu)"),
+    district: Optional[str] = Query(default=None, description="District name (e.g., Chennai)"),
+    component: str = Query(default="Whole Blood", description="Blood component"),
+    lat: Optional[float] = Query(default=None, ge=-90, le=90, description="Latitude for a nearby search"),
+    lon: Optional[float] = Query(default=None, ge=-180, le=180, description="Longitude for a nearby search"),
+    radius: float = Query(default=25, gt=0, le=500, description="Nearby search radius in km"),
+    limit: Optional[int] = Query(default=None, ge=1, le=100, description="Blood banks per page"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated blood bank fields to return"),
+    compact: bool = Query(default=False, description="Omit strategy data duplicated in primary_result")
+):
+    """Get blood availability information by state/district, or near lat/lon within radius km"""
+    if lat is not None or lon is not None:
+        if lat is None or lon is None:
+            raise HTTPException(status_code=400, detail="lat and lon must be given together")
+        # The spatial query itself is bounded; pages are cut from the nearest 100
+        result = blood_service.get_nearby_availability(lat, lon, radius, blood_group, component, 100)
+        fingerprint = query_fingerprint("nearby", lat, lon, radius, blood_group, component)
+    elif not state or not district:
+        raise HTTPException(status_code=400, detail="Provide state and district, or lat and lon")
+    else:
+        result = blood_service.get_blood_availability(state, district, blood_group, component)
+        fingerprint = query_fingerprint("district", state, district, blood_group, component)
+
+    # Fallback-only answers are static directory data: revalidate them with a weak ETag
+    etag = None
+    if (result.get("primary_result") or {}).get("source") == "fallback_database":
+        etag = weak_etag(result["primary_result"], compact, fields, limit, cursor, fingerprint)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    try:
+        shaped = shape_availability(result, compact, parse_fields(fields), limit, cursor, fingerprint)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if etag is None:
+        return shaped
+    return FastJSONResponse(shaped, headers=validator_headers(etag))
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def _format_stream_event(event: Dict, stream_format: str) -> str:
+    payload = json.dumps(event["data"], default=str)
+    if stream_format == "sse":
+        return f"event: {event['event']}\ndata: {payload}\n\n"
+    return json.dumps({"event": event["event"], "data": event["data"]}, default=str) + "\n"
+
+@app.get("/blood-availability/stream")
+def blood_availability_stream(
     state: str = Query(..., description="State name (e.g., Tamil Nadu)"),
     district: str = Query(..., description="District name (e.g., Chennai)"),
     blood_group: str = Query(..., description="Blood group (A+, B+, etc.)"),
-    component: str = Query(default="Whole Blood", description="Blood component")
+    component: str = Query(default="Whole Blood", description="Blood component"),
+    format: str = Query(default="ndjson", description="Stream format: ndjson/sse")
 ):
-    """Get blood availability information"""
-    return blood_service.get_blood_availability(state, district, blood_group, component)
+    """Stream blood availability: fallback data first, then each strategy, then the final result"""
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    events = blood_service.stream_blood_availability(state, district, blood_group, component)
+    return StreamingResponse(
+        (_format_stream_event(event, format) for event in events),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/blood-availability/batch")
+def blood_availability_batch(request: BatchAvailabilityRequest):
+    """Get blood availability for many locations/blood groups in one call"""
+    return blood_service.get_blood_availability_batch(
+        [query.model_dump() for query in request.queries],
+        include_compatible=request.include_compatible
+    )
 
 @app.get("/debug/eraktkosh-connectivity")
 def debug_eraktkosh_connectivity():
@@ -121,19 +235,21 @@ def debug_eraktkosh_connectivity():
     return blood_service.test_connectivity()
 
 # Chatbot endpoints
+ai_root_representation = CachedRepresentation(lambda: {
+    "message": "ThalAssist+ AI Chatbot API",
+    "version": "2.0.0",
+    "ai_features": [
+        "AI-Powered Message Routing",
+        "Blood Bridge Coordination",
+        "Emergency Blood Request System",
+        "Predictive Donor Engagement",
+        "Automated FAQ Handling"
+    ]
+})
+
 @app.get("/api/ai")
-async def ai_root():
-    return {
-        "message": "ThalAssist+ AI Chatbot API",
-        "version": "2.0.0",
-        "ai_features": [
-            "AI-Powered Message Routing",
-            "Blood Bridge Coordination",
-            "Emergency Blood Request System",
-            "Predictive Donor Engagement",
-            "Automated FAQ Handling"
-        ]
-    }
+async def ai_root(request: Request):
+    return ai_root_representation.respond(request)
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
@@ -256,20 +372,24 @@ async def clear_conversation():
         logging.error(f"Clear conversation error: {str(e)}")
         raise HTTPException(status_code=500, detail="Error clearing conversation")
 
+def _build_faq_topics() -> Dict:
+    topics = []
+    for key, data in ai_chatbot.faq_database.items():
+        topics.append({
+            "topic": key.replace("_", " ").title(),
+            "category": data.get("category", "general").value if hasattr(data.get("category"), 'value') else "general",
+            "severity": data.get("severity", "general"),
+            "has_ai_actions": data.get("action_available", False)
+        })
+    return {"faq_topics": topics}
+
+faq_topics_representation = CachedRepresentation(_build_faq_topics)
+
 @app.get("/api/faq/topics")
-async def get_faq_topics():
+async def get_faq_topics(request: Request):
     """Get available FAQ topics with AI categorization"""
     try:
-        topics = []
-        for key, data in ai_chatbot.faq_database.items():
-            topics.append({
-                "topic": key.replace("_", " ").title(),
-                "category": data.get("category", "general").value if hasattr(data.get("category"), 'value') else "general",
-                "severity": data.get("severity", "general"),
-                "has_ai_actions": data.get("action_available", False)
-            })
-        
-        return {"faq_topics": topics}
+        return faq_topics_representation.respond(request)
         
     except Exception as e:
         logging.error(f"FAQ topics error: {str(e)}")
@@ -278,20 +398,76 @@ async def get_faq_topics():
 
 
 # Donor matching endpoints
+DONOR_CURSOR_FIELDS = ("score", "donations", "key")
+
 @app.get("/donor-match")
 def donor_match(
     blood_group: str = Query(..., description="Required blood group"),
     location: str = Query(..., description="Location (city/state)"),
-    urgency: str = Query(default="normal", description="Urgency level: normal/urgent/emergency")
+    urgency: str = Query(default="normal", description="Urgency level: normal/urgent/emergency"),
+    limit: int = Query(default=10, ge=1, le=100, description="Donors per page"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated donor fields to return (e.g. name,phone)"),
+    compact: bool = Query(default=False, description="Hoist shared urgency context and omit search tips")
 ):
     """Find potential blood donors"""
-    return donor_service.find_donors(blood_group, location, urgency)
+    fingerprint = query_fingerprint("donors", blood_group, location, urgency)
+    try:
+        after = cursor_after(cursor, fingerprint, DONOR_CURSOR_FIELDS)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = donor_service.find_donors(blood_group, location, urgency, limit=limit, after=after)
+    next_after = result.pop("next_after")
+    if compact:
+        result = compact_donor_match(result)
+    result["donors"] = project(result["donors"], parse_fields(fields))
+
+    # Keyset cursor: the last donor's (score, donation count, key) position, stable while donors register
+    result["page"] = {
+        "returned": len(result["donors"]),
+        "total": result["donors_found"],
+        "next_cursor": encode_cursor(dict(zip(DONOR_CURSOR_FIELDS, next_after)), fingerprint) if next_after else None
+    }
+    return result
+
+@app.get("/donor-match/phenotype")
+def donor_match_phenotype(
+    blood_group: str = Query(..., description="Patient blood group"),
+    location: str = Query(..., description="Location (city/state)"),
+    antibodies: Optional[str] = Query(default=None, description="Patient alloantibodies, e.g. anti-K,anti-E"),
+    patient_antigens: Optional[str] = Query(default=None, description="Patient phenotype, e.g. C+ c- E- e+ K-"),
+    urgency: str = Query(default="normal", description="Urgency level: normal/urgent/emergency"),
+    limit: int = Query(default=10, ge=1, le=100, description="Donors to return"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated donor fields to return (e.g. name,phone)")
+):
+    """Find donors antigen-matched beyond ABO/RhD for chronically transfused patients"""
+    try:
+        result = donor_service.find_phenotype_matches(
+            blood_group, location, antibodies, patient_antigens, urgency, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["donors"] = project(result["donors"], parse_fields(fields))
+    return result
 
 @app.post("/donor-register")
 def register_donor(donor_data: dict):
     """Register a new blood donor"""
     return donor_service.register_donor(donor_data)
 
+@app.patch("/donors/{donor_id}/status")
+def update_donor_status(donor_id: str, update: DonorStatusUpdate):
+    """Mark a donor available/not available or verified"""
+    return donor_service.update_donor_status(donor_id, update.status, update.verified)
+
+@app.get("/donor-statistics")
+def donor_statistics(
+    location: Optional[str] = Query(default=None, description="City and/or state, e.g. Chennai or Tamil Nadu")
+):
+    """Donor counts by blood group, availability and verification for the dashboard"""
+    return donor_service.get_donor_statistics(location)
+
 
 if __name__ == "__main__":
     import uvicorn
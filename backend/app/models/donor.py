@@ -0,0 +1,122 @@
+# backend/app/models/donor.py
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Text, JSON, Index
+from datetime import datetime
+from app.utils.database import Base
+from app.services.utils.blood_mappings import format_antigen_profile
+
+
+class Donor(Base):
+    __tablename__ = "donors"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    blood_group = Column(String(3), nullable=False, index=True)
+    location = Column(String, nullable=False)
+
+    # Normalized "city, state" parts of location, for indexed matching
+    city_key = Column(String, nullable=False, default="")
+    state_key = Column(String, nullable=False, default="")
+
+    phone = Column(String, nullable=False)
+    email = Column(String, default="")
+    age = Column(Integer, nullable=True)
+    weight = Column(Integer, nullable=True)
+    medical_conditions = Column(JSON, default=list)
+
+    # Extended antigen phenotype bitsets (see blood_mappings.EXTENDED_ANTIGENS)
+    antigen_typed = Column(Integer, nullable=False, default=0)
+    antigen_positive = Column(Integer, nullable=False, default=0)
+
+    last_donation = Column(String, nullable=True)
+    eligible_next = Column(Date, nullable=False, index=True)
+    status = Column(String, nullable=False, default="available")
+    verified = Column(Boolean, default=False)
+    donation_count = Column(Integer, default=0)
+    registration_date = Column(DateTime, default=datetime.now)
+
+    # Stamped from DonorRevision on every insert and update, so workers can pick up each other's changes
+    revision = Column(Integer, nullable=False, default=0, index=True)
+
+    __table_args__ = (
+        Index("ix_donors_city_group", "city_key", "blood_group"),
+        Index("ix_donors_state_group", "state_key", "blood_group"),
+    )
+
+    @property
+    def donor_id(self) -> str:
+        return f"D{self.id:03d}"
+
+    def to_dict(self):
+        return {
+            "id": self.donor_id,
+            "name": self.name,
+            "blood_group": self.blood_group,
+            "location": self.location,
+            "phone": self.phone,
+            "email": self.email,
+            "age": self.age,
+            "weight": self.weight,
+            "last_donation": self.last_donation,
+            "medical_conditions": self.medical_conditions or [],
+            "antigen_profile": format_antigen_profile(self.antigen_typed or 0, self.antigen_positive or 0),
+            "eligible_next": self.eligible_next.strftime("%Y-%m-%d"),
+            "status": self.status,
+            "verified": self.verified,
+            "donation_count": self.donation_count,
+            "registration_date": self.registration_date.isoformat() if self.registration_date else None,
+        }
+
+
+class DonorRevision(Base):
+    """Single-row counter handing out Donor.revision values.
+
+    A write bumps it first, which holds the row (or, on SQLite, the
+    database) locked until commit, so revisions are committed in order.
+    """
+    __tablename__ = "donor_revision"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class DonationRequest(Base):
+    __tablename__ = "donation_requests"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    patient_name = Column(String, default="Anonymous")
+    blood_group = Column(String(3), nullable=False, index=True)
+    location = Column(String, nullable=False)
+    urgency = Column(String, default="normal")
+    hospital = Column(String, default="")
+    contact_person = Column(String, default="")
+    contact_phone = Column(String, nullable=False)
+    units_needed = Column(Integer, default=1)
+    component_type = Column(String, default="Whole Blood")
+    needed_by = Column(String, default="")
+    additional_info = Column(Text, default="")
+    status = Column(String, nullable=False, default="active", index=True)
+    created_date = Column(DateTime, default=datetime.now)
+    responses = Column(JSON, default=list)
+
+    @property
+    def request_id(self) -> str:
+        return f"R{self.id:03d}"
+
+    def to_dict(self):
+        return {
+            "id": self.request_id,
+            "patient_name": self.patient_name,
+            "blood_group": self.blood_group,
+            "location": self.location,
+            "urgency": self.urgency,
+            "hospital": self.hospital,
+            "contact_person": self.contact_person,
+            "contact_phone": self.contact_phone,
+            "units_needed": self.units_needed,
+            "component_type": self.component_type,
+            "needed_by": self.needed_by,
+            "additional_info": self.additional_info,
+            "status": self.status,
+            "created_date": self.created_date.isoformat() if self.created_date else None,
+            "responses": self.responses or [],
+        }
@@ -2,6 +2,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, Text
 from sqlalchemy.sql import func
 from app.utils.database import Base 
+from app.services.utils.blood_mappings import antigen_names, format_antigen_profile
 from sqlalchemy.ext.declarative import declarative_base
 import enum
 
@@ -33,6 +34,11 @@ class User(Base):
     emergency_contact = Column(String, nullable=True)
     last_transfusion = Column(DateTime, nullable=True)
     urgency_level = Column(String, default="Low")
+    antibodies = Column(Integer, default=0)  # antigens the patient has alloantibodies against
+    
+    # Extended antigen phenotype bitsets (see blood_mappings.EXTENDED_ANTIGENS)
+    antigen_typed = Column(Integer, default=0)
+    antigen_positive = Column(Integer, default=0)
     
     # Donor specific fields
     weight = Column(Integer, nullable=True)
@@ -58,6 +64,8 @@ class User(Base):
             "emergencyContact": self.emergency_contact,
             "lastTransfusion": self.last_transfusion.isoformat() if self.last_transfusion else None,
             "urgencyLevel": self.urgency_level,
+            "antibodies": antigen_names(self.antibodies or 0),
+            "antigenProfile": format_antigen_profile(self.antigen_typed or 0, self.antigen_positive or 0),
             # Donor fields
             "weight": self.weight,
             "lastDonation": self.last_donation.isoformat() if self.last_donation else None,
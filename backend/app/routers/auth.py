@@ -7,6 +7,7 @@ from pydantic import BaseModel, EmailStr
 from app.services.auth_service import AuthService
 from app.models.user import User, UserType
 from app.utils.database import get_db
+from app.services.utils.blood_mappings import parse_antibodies, parse_antigen_profile
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 security = HTTPBearer()
@@ -25,9 +26,11 @@ class RegisterRequest(BaseModel):
     blood_group: str
     city: str
     date_of_birth: str = None
+    antigen_profile: str = None  # e.g. "C+ c- E- e+ K-"
     # Patient specific
     medical_history: str = None
     emergency_contact: str = None
+    antibodies: str = None  # e.g. "anti-K, anti-E"
     # Donor specific
     weight: int = None
     last_donation: str = None
@@ -67,6 +70,12 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
+    try:
+        antigen_typed, antigen_positive = parse_antigen_profile(request.antigen_profile)
+        antibodies = parse_antibodies(request.antibodies)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
     # Create new user
     hashed_password = AuthService.get_password_hash(request.password)
     user = User(
@@ -80,6 +89,9 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
         medical_history=request.medical_history,
         emergency_contact=request.emergency_contact,
         weight=request.weight,
+        antigen_typed=antigen_typed,
+        antigen_positive=antigen_positive,
+        antibodies=antibodies,
     )
     
     db.add(user)
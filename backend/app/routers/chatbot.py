@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from app.services.chatbot_service import AIChatbotService
+from app.utils.responses import FastJSONRoute
 
-router = APIRouter(prefix="/api/chatbot", tags=["chatbot"])
+router = APIRouter(prefix="/api/chatbot", tags=["chatbot"], route_class=FastJSONRoute)
 chatbot = AIChatbotService()
 
 class ChatMessage(BaseModel):
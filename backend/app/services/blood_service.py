@@ -1,78 +1,198 @@
+import asyncio
+import hashlib
 import requests
 import re
-from bs4 import BeautifulSoup
 import logging
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List
 import json
+import threading
+import time
 from datetime import datetime
-from .utils.blood_mappings import BLOOD_GROUP_MAPPING, COMPONENT_MAPPING
-from .utils.fallback_data import FALLBACK_BLOOD_BANKS
+from concurrent.futures import ThreadPoolExecutor, wait
+from decouple import config
+from .utils.blood_mappings import compatible_donor_groups
+from .utils.normalization import normalize_blood_group, normalize_component
+from .utils.fallback_data import FALLBACK_BLOOD_BANKS, LOCATION_ALIASES
+from .utils.location_index import LocationIndex
+from .utils.result_cache import TTLCache, FRESH, STALE
+from .utils.single_flight import SingleFlight, SingleFlightTimeout
+from .utils.form_schema import FormSchema, FormSchemaCache, extract_form_schema
+from .utils.circuit_breaker import BreakerRegistry
+from .utils.html_parsing import analyze_page_structure, extract_links, find_forms, parse_results
+from .eraktkosh_discovery import MirrorDiscovery
+from .scrape_engine import AsyncScrapeEngine
+from .stock_harvester import HARVEST_ENABLED, SNAPSHOT_DATABASE, StockHarvester, StockSnapshotStore
 
 logger = logging.getLogger(__name__)
 
+AVAILABILITY_CACHE_TTL = config("AVAILABILITY_CACHE_TTL", default=300, cast=float)
+AVAILABILITY_CACHE_STALE_TTL = config("AVAILABILITY_CACHE_STALE_TTL", default=1800, cast=float)
+AVAILABILITY_CACHE_MAX_ENTRIES = config("AVAILABILITY_CACHE_MAX_ENTRIES", default=1024, cast=int)
+AVAILABILITY_WAIT_TIMEOUT = config("AVAILABILITY_WAIT_TIMEOUT", default=30, cast=float)
+SCRAPE_DEADLINE = config("SCRAPE_DEADLINE", default=25, cast=float)
+BATCH_MAX_WORKERS = config("AVAILABILITY_BATCH_MAX_WORKERS", default=8, cast=int)
+BATCH_DEADLINE = config("AVAILABILITY_BATCH_DEADLINE", default=40, cast=float)
+CONNECTIVITY_DEADLINE = config("CONNECTIVITY_DEADLINE", default=10, cast=float)
+CONNECTIVITY_MIN_INTERVAL = config("CONNECTIVITY_MIN_INTERVAL", default=30, cast=float)
+FORM_SCHEMA_TTL = config("FORM_SCHEMA_TTL", default=6 * 3600, cast=float)
+
+CONNECTIVITY_TEST_URLS = [
+    "https://eraktkosh.mohfw.gov.in/BLDAHIMS/bloodbank",
+    "https://eraktkosh.mohfw.gov.in/eraktkoshPortal",
+    "https://eraktkosh.mohfw.gov.in",
+    "https://www.eraktkosh.in"
+]
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
 class BloodBankService:
-    def __init__(self):
+    def __init__(self, mirror_urls: Optional[List[str]] = None, snapshot_store: Optional[StockSnapshotStore] = None,
+                 connectivity_urls: Optional[List[str]] = None):
+        self.connectivity_urls = connectivity_urls or CONNECTIVITY_TEST_URLS
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.working_base_url = None
-        self._test_and_set_working_url()
-
-    def _test_and_set_working_url(self):
-        """Find and set the working eRaktKosh URL"""
-        test_urls = [
-            "https://eraktkosh.mohfw.gov.in",
-            "https://eraktkosh.mohfw.gov.in/eraktkoshPortal",
-            "https://www.eraktkosh.in"
-        ]
-        
-        for url in test_urls:
-            try:
-                resp = self.session.get(url, timeout=10)
-                if resp.status_code == 200 and len(resp.text) > 100:
-                    self.working_base_url = url
-                    logger.info(f"Working eRaktKosh URL found: {url}")
-                    return
-            except Exception as e:
-                logger.debug(f"URL {url} failed: {e}")
-        
-        logger.warning("No working eRaktKosh URL found, using fallback data only")
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        # Mirror probing runs in the background (see start_background_tasks)
+        self.discovery = MirrorDiscovery(self.session, mirror_urls)
+        # One circuit breaker per upstream host, shared by the session and the scrape engine
+        self.breakers = BreakerRegistry()
+        # Scraping shares one pooled keep-alive async client across request threads
+        self.engine = AsyncScrapeEngine(headers={'User-Agent': USER_AGENT}, breakers=self.breakers)
+        self.form_schemas = FormSchemaCache(ttl=FORM_SCHEMA_TTL)
+        self.location_index = LocationIndex(FALLBACK_BLOOD_BANKS, LOCATION_ALIASES)
+        # Harvested stock answers lookups locally; scraping only refreshes what it lacks
+        # With harvesting disabled nothing would fill the snapshot, so don't create its file
+        self.snapshot_store = snapshot_store or StockSnapshotStore(SNAPSHOT_DATABASE if HARVEST_ENABLED else ":memory:")
+        self.harvester = StockHarvester(self.engine, self.snapshot_store, self.discovery)
+        self.availability_cache = TTLCache(
+            ttl=AVAILABILITY_CACHE_TTL,
+            stale_ttl=AVAILABILITY_CACHE_STALE_TTL,
+            max_entries=AVAILABILITY_CACHE_MAX_ENTRIES
+        )
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="availability-refresh")
+        # Bounded fan-out for batch lookups, shared by all batch requests
+        self._batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="availability-batch")
+        # Identical concurrent lookups share one upstream fetch
+        self._inflight = SingleFlight()
+        # Last test_connectivity result and per-page analyses, reused by repeat calls
+        self._connectivity_snapshot = None
+        self._connectivity_lock = threading.Lock()
+        self._page_analysis_cache = TTLCache(ttl=24 * 3600, stale_ttl=0, max_entries=64)
+
+    @property
+    def working_base_url(self) -> Optional[str]:
+        """Confirmed eRaktKosh mirror, or None while serving fallback data"""
+        return self.discovery.working_base_url
+
+    def start_background_tasks(self):
+        """Start mirror discovery and the stock harvester; call from the application lifespan"""
+        self.discovery.start()
+        if HARVEST_ENABLED:
+            self.harvester.start()
+
+    async def stop_background_tasks(self):
+        """Stop background tasks started by start_background_tasks"""
+        await self.discovery.stop()
+        await self.harvester.stop()
+        await asyncio.to_thread(self.engine.close)
 
     def test_connectivity(self) -> Dict:
-        """Test eRaktKosh connectivity and find working endpoints"""
-        test_urls = [
-            "https://eraktkosh.mohfw.gov.in/BLDAHIMS/bloodbank",
-            "https://eraktkosh.mohfw.gov.in/eraktkoshPortal", 
-            "https://eraktkosh.mohfw.gov.in",
-            "https://www.eraktkosh.in"
-        ]
-        
+        """Test eRaktKosh connectivity and find working endpoints.
+
+        Probes run concurrently under one deadline. Calls within
+        CONNECTIVITY_MIN_INTERVAL of the last run, and calls made while a run
+        is in progress, are answered from the last diagnostic snapshot.
+        """
+        with self._connectivity_lock:
+            snapshot = self._connectivity_snapshot
+        if snapshot and time.monotonic() - snapshot[0] < CONNECTIVITY_MIN_INTERVAL:
+            return self._with_diagnostic_metadata(snapshot, cached=True)
+
+        snapshot, shared = self._inflight.do("test_connectivity", self._run_connectivity_probes)
+        return self._with_diagnostic_metadata(snapshot, cached=shared)
+
+    def _run_connectivity_probes(self) -> tuple:
+        started = time.monotonic()
+        try:
+            responses = self.engine.run(self._fetch_connectivity_pages(), timeout=CONNECTIVITY_DEADLINE + 5)
+        except Exception as e:
+            logger.error(f"Connectivity probes failed: {e!r}")
+            responses = {url: e for url in self.connectivity_urls}
+
         results = {}
-        
-        for url in test_urls:
-            try:
-                resp = self.session.get(url, timeout=10)
-                results[url] = {
-                    "status": resp.status_code,
-                    "accessible": resp.status_code == 200,
-                    "content_length": len(resp.text),
-                    "has_blood_related_content": self._check_blood_content(resp.text),
-                    "potential_endpoints": self._extract_endpoints(resp.text)
-                }
-                
-                # If this URL works, try to find specific endpoints
-                if resp.status_code == 200:
-                    results[url]["detailed_analysis"] = self._analyze_page_structure(resp.text)
-                    
-            except Exception as e:
+        for url in self.connectivity_urls:
+            resp = responses.get(url)
+            breaker_state = self.breakers.for_url(url).snapshot()["state"]
+            if isinstance(resp, Exception) or resp is None:
                 results[url] = {
                     "status": None,
                     "accessible": False,
-                    "error": str(e)
+                    "circuit_breaker": breaker_state,
+                    "error": str(resp) if resp is not None else "Timed out"
                 }
-        
-        return results
+                continue
+
+            results[url] = {
+                "status": resp.status_code,
+                "accessible": resp.status_code == 200,
+                "circuit_breaker": breaker_state,
+                "content_length": len(resp.text)
+            }
+            results[url].update(self._analyze_connectivity_page(url, resp.text, resp.status_code == 200))
+
+        results["mirror_discovery"] = self.discovery.snapshot()
+        results["circuit_breakers"] = self.breakers.snapshot()
+        results["stock_snapshot"] = dict(self.snapshot_store.stats(), last_harvest=self.harvester.last_run)
+
+        snapshot = (time.monotonic(), results, datetime.now().isoformat(), time.monotonic() - started)
+        with self._connectivity_lock:
+            self._connectivity_snapshot = snapshot
+        return snapshot
+
+    async def _fetch_connectivity_pages(self) -> Dict:
+        """Fetch every connectivity URL concurrently; unfinished fetches are cancelled at the deadline"""
+        # Probes bypass the breakers so that a recovered host shows as reachable while its breaker is still open
+        tasks = {url: asyncio.create_task(self.engine.probe(url)) for url in self.connectivity_urls}
+        await asyncio.wait(tasks.values(), timeout=CONNECTIVITY_DEADLINE)
+
+        responses = {}
+        for url, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                responses[url] = TimeoutError(f"No response within {CONNECTIVITY_DEADLINE}s")
+            elif task.exception() is not None:
+                responses[url] = task.exception()
+            else:
+                responses[url] = task.result()
+        return responses
+
+    def _analyze_connectivity_page(self, url: str, html: str, detailed: bool) -> Dict:
+        """Content analysis of a probed page, cached per URL and content hash"""
+        key = (url, hashlib.sha1(html.encode("utf-8", "replace")).hexdigest(), detailed)
+        lookup = self._page_analysis_cache.get(key)
+        if lookup.status == FRESH:
+            return lookup.value
+
+        analysis = {
+            "has_blood_related_content": self._check_blood_content(html),
+            "potential_endpoints": self._extract_endpoints(html)
+        }
+        # If this URL works, try to find specific endpoints
+        if detailed:
+            analysis["detailed_analysis"] = self._analyze_page_structure(html)
+        self._page_analysis_cache.set(key, analysis)
+        return analysis
+
+    def _with_diagnostic_metadata(self, snapshot: tuple, cached: bool) -> Dict:
+        created, results, generated_at, duration = snapshot
+        response = dict(results)
+        response["diagnostics"] = {
+            "generated_at": generated_at,
+            "age_seconds": round(time.monotonic() - created, 3),
+            "duration_seconds": round(duration, 3),
+            "served_from_snapshot": cached,
+            "min_interval_seconds": CONNECTIVITY_MIN_INTERVAL
+        }
+        return response
 
     def _check_blood_content(self, html: str) -> bool:
         """Check if page contains blood-related content"""
@@ -102,219 +222,153 @@ class BloodBankService:
 
     def _analyze_page_structure(self, html: str) -> Dict:
         """Analyze page structure for scraping opportunities"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        analysis = {
-            "forms": len(soup.find_all('form')),
-            "select_elements": len(soup.find_all('select')),
-            "input_elements": len(soup.find_all('input')),
-            "potential_state_dropdown": False,
-            "potential_district_dropdown": False,
-            "ajax_calls": []
-        }
-        
-        # Look for state/district dropdowns
-        selects = soup.find_all('select')
-        for select in selects:
-            select_id = select.get('id', '').lower()
-            select_name = select.get('name', '').lower()
-            if any(keyword in select_id or keyword in select_name 
-                   for keyword in ['state', 'stat']):
-                analysis["potential_state_dropdown"] = True
-            if any(keyword in select_id or keyword in select_name 
-                   for keyword in ['district', 'dist']):
-                analysis["potential_district_dropdown"] = True
-        
-        # Look for AJAX calls in scripts
-        scripts = soup.find_all('script')
-        for script in scripts:
-            if script.string:
-                ajax_patterns = ['$.ajax', '$.get', '$.post', 'XMLHttpRequest', 'fetch(']
-                for pattern in ajax_patterns:
-                    if pattern in script.string:
-                        analysis["ajax_calls"].append(pattern)
-        
-        return analysis
+        return analyze_page_structure(html)
 
     def try_eraktkosh_scraping(self, state: str, district: str, blood_group: str, component: str) -> Optional[Dict]:
         """Enhanced scraping with better endpoint detection"""
-        if not self.working_base_url:
+        base_url = self.working_base_url
+        if not base_url:
             return None
         
         try:
-            # Try the main portal first
-            portal_resp = self.session.get(self.working_base_url, timeout=10)
-            if portal_resp.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(portal_resp.text, 'html.parser')
-            
-            # Look for blood availability or stock links
-            blood_links = []
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '').lower()
-                text = link.get_text(strip=True).lower()
-                
-                if any(keyword in href or keyword in text 
-                       for keyword in ['stock', 'availability', 'search', 'blood']):
-                    full_url = href if href.startswith('http') else self.working_base_url + href
-                    blood_links.append(full_url)
-            
-            # Try each blood-related link
-            for link in blood_links[:5]:  # Try first 5 links
-                try:
-                    link_resp = self.session.get(link, timeout=10)
-                    if link_resp.status_code == 200:
-                        # Try to find and submit forms
-                        form_result = self._try_form_submission(link_resp.text, link, state, district, blood_group, component)
-                        if form_result:
-                            return form_result
-                            
-                except Exception as e:
-                    logger.debug(f"Failed to process link {link}: {e}")
-                    continue
-            
-            return {
-                "source": "scraping_attempted",
-                "status": "no_forms_found",
-                "links_tried": blood_links,
-                "suggestion": "Manual navigation required"
-            }
-            
+            return self.engine.run(
+                self._scrape_portal(base_url, state, district, blood_group, component),
+                timeout=SCRAPE_DEADLINE
+            )
         except Exception as e:
-            logger.error(f"Scraping error: {e}")
+            logger.error(f"Scraping error: {e!r}")
             return None
 
-    def _try_form_submission(self, html: str, url: str, state: str, district: str, blood_group: str, component: str) -> Optional[Dict]:
-        """Try to submit forms found on the page"""
-        soup = BeautifulSoup(html, 'html.parser')
-        forms = soup.find_all('form')
+    async def _scrape_portal(self, base_url: str, state: str, district: str, blood_group: str, component: str) -> Optional[Dict]:
+        """Fetch the portal, then probe candidate links concurrently until one yields results"""
+        # Warm path: one request through the form discovered on an earlier lookup
+        schema = self.form_schemas.get(base_url)
+        if schema:
+            try:
+                form_result = await self._submit_form(schema, state, district, blood_group, component)
+                if form_result:
+                    # Includes a results table with no stock rows: that is an answer, not drift
+                    return form_result
+            except Exception as e:
+                logger.debug(f"Cached form submission failed: {e}")
+            # HTTP error, expired session or schema drift (no results table): rediscover from the portal
+            logger.info(f"Invalidating cached eRaktKosh form schema for {base_url}")
+            self.form_schemas.invalidate(base_url)
+        
+        portal_resp = await self.engine.get(base_url)
+        if portal_resp.status_code != 200:
+            return None
+        
+        blood_links = self._extract_blood_links(portal_resp.text, base_url)
+        
+        # Probe the first 5 links concurrently; the first one with results wins
+        tasks = [
+            asyncio.create_task(self._probe_link(base_url, link, state, district, blood_group, component))
+            for link in blood_links[:5]
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                form_result = await next_done
+                if form_result:
+                    return form_result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
-        for form in forms:
+        return {
+            "source": "scraping_attempted",
+            "status": "no_forms_found",
+            "links_tried": blood_links,
+            "suggestion": "Manual navigation required"
+        }
+
+    def _extract_blood_links(self, html: str, base_url: str) -> List[str]:
+        """Collect links on the portal page that look like stock/availability pages"""
+        blood_links = []
+        for href, text in extract_links(html):
+            href = href.lower()
+            if any(keyword in href or keyword in text 
+                   for keyword in ['stock', 'availability', 'search', 'blood']):
+                full_url = href if href.startswith('http') else base_url + href
+                blood_links.append(full_url)
+        
+        return blood_links
+
+    async def _probe_link(self, base_url: str, link: str, state: str, district: str, blood_group: str, component: str) -> Optional[Dict]:
+        """Fetch one candidate link and try submitting its forms"""
+        try:
+            link_resp = await self.engine.get(link)
+            if link_resp.status_code == 200:
+                return await self._try_form_submission(base_url, link_resp.text, link, state, district, blood_group, component)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Failed to process link {link}: {e}")
+        return None
+
+    async def _try_form_submission(self, base_url: str, html: str, url: str, state: str, district: str, blood_group: str,
+                                   component: str) -> Optional[Dict]:
+        """Try to submit forms found on the page, caching the schema of the one that works"""
+        for form in find_forms(html):
             try:
-                action = form.get('action', '')
-                method = form.get('method', 'get').lower()
-                
-                # Build form data
-                form_data = {}
-                for input_elem in form.find_all(['input', 'select']):
-                    name = input_elem.get('name')
-                    if not name:
-                        continue
-                    
-                    name_lower = name.lower()
-                    
-                    # Try to match form fields to our data
-                    if any(keyword in name_lower for keyword in ['state', 'stat']):
-                        form_data[name] = self._find_state_code(state, input_elem)
-                    elif any(keyword in name_lower for keyword in ['district', 'dist']):
-                        form_data[name] = district
-                    elif any(keyword in name_lower for keyword in ['blood', 'group']):
-                        form_data[name] = self._normalize_blood_group(blood_group)
-                    elif any(keyword in name_lower for keyword in ['component', 'type']):
-                        form_data[name] = self._normalize_component(component)
-                    elif input_elem.get('type') == 'hidden':
-                        form_data[name] = input_elem.get('value', '')
+                schema = extract_form_schema(form, url)
+                if not schema:
+                    continue
                 
-                if form_data:
-                    # Submit form
-                    form_url = action if action.startswith('http') else url.split('?')[0].rsplit('/', 1)[0] + '/' + action
-                    
-                    if method == 'post':
-                        resp = self.session.post(form_url, data=form_data, timeout=10)
-                    else:
-                        resp = self.session.get(form_url, params=form_data, timeout=10)
-                    
-                    if resp.status_code == 200:
-                        # Try to parse results
-                        result_data = self._parse_results_page(resp.text)
-                        if result_data:
-                            return {
-                                "source": "form_submission",
-                                "url": form_url,
-                                "method": method,
-                                "form_data": form_data,
-                                "results": result_data
-                            }
+                form_result = await self._submit_form(schema, state, district, blood_group, component)
+                # Only a form that returned stock rows is known to be the search form
+                if form_result and form_result["results"]["total_found"]:
+                    self.form_schemas.set(base_url, schema)
+                    return form_result
                         
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.debug(f"Form submission failed: {e}")
                 continue
         
         return None
 
-    def _find_state_code(self, state: str, select_elem) -> str:
-        """Find state code from select options"""
-        if select_elem.name != 'select':
-            return state
-        
-        options = select_elem.find_all('option')
-        state_lower = state.lower()
-        
-        for option in options:
-            value = option.get('value', '')
-            text = option.get_text(strip=True).lower()
-            
-            if state_lower in text or text in state_lower:
-                return value if value else text
-        
-        return state
-
-    def _normalize_blood_group(self, blood_group: str) -> str:
-        """Normalize blood group format"""
-        bg_upper = blood_group.upper().strip()
-        
-        # Try exact match first
-        for standard, variants in BLOOD_GROUP_MAPPING.items():
-            if bg_upper in [v.upper() for v in variants]:
-                return standard
-        
-        return blood_group
+    async def _submit_form(self, schema: FormSchema, state: str, district: str, blood_group: str, component: str) -> Optional[Dict]:
+        """Submit a lookup through a known form schema and parse the results.
 
-    def _normalize_component(self, component: str) -> str:
-        """Normalize blood component format"""
-        comp_upper = component.upper().strip()
+        None means the submission did not reach a results page: an HTTP
+        error, or a page without a results table (session expired, form
+        changed). A results table with no stock rows is returned with an
+        empty ``blood_banks`` list.
+        """
+        form_data = schema.build_form_data(
+            state, district,
+            normalize_blood_group(blood_group),
+            normalize_component(component)
+        )
+        
+        if schema.method == 'post':
+            resp = await self.engine.post(schema.url, data=form_data)
+        else:
+            resp = await self.engine.get(schema.url, params=form_data)
+        
+        if resp.status_code != 200:
+            return None
         
-        for standard, variants in COMPONENT_MAPPING.items():
-            if comp_upper in [v.upper() for v in variants]:
-                return standard
+        result_data = self._parse_results_page(resp.text)
+        if result_data is None:
+            return None
         
-        return component
+        return {
+            "source": "form_submission",
+            "url": schema.url,
+            "method": schema.method,
+            "form_data": form_data,
+            "results": result_data
+        }
 
     def _parse_results_page(self, html: str) -> Optional[Dict]:
-        """Parse results from eRaktKosh response"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Look for tables with blood bank data
-        tables = soup.find_all('table')
-        blood_banks = []
-        
-        for table in tables:
-            rows = table.find_all('tr')
-            if len(rows) < 2:  # Need header + at least one data row
-                continue
-            
-            headers = [th.get_text(strip=True).lower() for th in rows[0].find_all(['th', 'td'])]
-            
-            # Check if this looks like a blood bank table
-            if not any(keyword in ' '.join(headers) 
-                      for keyword in ['blood', 'bank', 'hospital', 'availability']):
-                continue
-            
-            for row in rows[1:]:
-                cells = [td.get_text(strip=True) for td in row.find_all('td')]
-                if len(cells) < 2:
-                    continue
-                
-                bank_data = {}
-                for i, cell in enumerate(cells):
-                    if i < len(headers):
-                        bank_data[headers[i]] = cell
-                
-                if bank_data:
-                    blood_banks.append(bank_data)
+        """Parse results from eRaktKosh response; None when the page has no results table"""
+        blood_banks = parse_results(html)
         
-        if blood_banks:
+        if blood_banks is not None:
             return {
                 "blood_banks": blood_banks,
                 "total_found": len(blood_banks),
@@ -325,19 +379,10 @@ class BloodBankService:
 
     def get_fallback_data(self, state: str, district: str, blood_group: str, component: str) -> Dict:
         """Get fallback blood bank data"""
-        # Normalize inputs for matching
-        state_key = None
-        district_key = None
+        # Resolve inputs against the prebuilt location index (exact, alias, token and trigram matches)
+        state_candidates = self.location_index.resolve_state(state)
         
-        # Find matching state (case-insensitive, partial match)
-        for fb_state in FALLBACK_BLOOD_BANKS.keys():
-            if (state.lower() in fb_state.lower() or 
-                fb_state.lower() in state.lower() or
-                any(word in fb_state.lower() for word in state.lower().split())):
-                state_key = fb_state
-                break
-        
-        if not state_key:
+        if not state_candidates:
             return {
                 "source": "fallback_database",
                 "blood_banks": [],
@@ -345,16 +390,11 @@ class BloodBankService:
                 "suggestion": "Try searching for nearby major cities."
             }
         
-        # Find matching district
+        state_key, state_score = state_candidates[0]
         districts_data = FALLBACK_BLOOD_BANKS[state_key]
-        for fb_district in districts_data.keys():
-            if (district.lower() in fb_district.lower() or 
-                fb_district.lower() in district.lower() or
-                any(word in fb_district.lower() for word in district.lower().split())):
-                district_key = fb_district
-                break
+        district_candidates = self.location_index.resolve_district(state_key, district)
         
-        if not district_key:
+        if not district_candidates:
             # Return all districts in the state as alternatives
             return {
                 "source": "fallback_database",
@@ -364,69 +404,277 @@ class BloodBankService:
                 "suggestion": f"Try one of these districts: {', '.join(list(districts_data.keys())[:3])}"
             }
         
+        district_key, district_score = district_candidates[0]
+        
         # Filter blood banks by component availability
-        all_banks = districts_data[district_key]
         filtered_banks = []
-        
-        for bank in all_banks:
-            # Check if bank has the required component
-            bank_components = bank.get("components", [])
-            if any(self._component_matches(component, comp) for comp in bank_components):
-                bank_copy = bank.copy()
-                bank_copy.update({
-                    "availability_status": "Contact for current stock",
-                    "requested_component": component,
-                    "requested_blood_group": blood_group,
-                    "last_updated": "Static data - verify availability by calling"
-                })
-                filtered_banks.append(bank_copy)
+        for bank in self.location_index.banks_with_component(state_key, district_key, component):
+            bank_copy = bank.copy()
+            bank_copy.update({
+                "availability_status": "Contact for current stock",
+                "requested_component": component,
+                "requested_blood_group": blood_group,
+                "last_updated": "Static data - verify availability by calling"
+            })
+            filtered_banks.append(bank_copy)
         
         return {
             "source": "fallback_database",
             "blood_banks": filtered_banks,
             "total_banks": len(filtered_banks),
             "location": f"{district}, {state}",
+            "matched_location": {
+                "state": state_key,
+                "state_score": state_score,
+                "district": district_key,
+                "district_score": district_score
+            },
             "disclaimer": "This is static reference data. Please contact blood banks directly for real-time availability.",
             "urgent_note": "For emergency needs, call multiple blood banks or visit hospitals directly."
         }
 
-    def _component_matches(self, requested: str, available: str) -> bool:
-        """Check if requested component matches available component"""
-        req_norm = self._normalize_component(requested).lower()
-        avail_norm = available.lower()
-        
-        return (req_norm in avail_norm or avail_norm in req_norm or
-                any(variant.lower() in avail_norm 
-                    for variants in COMPONENT_MAPPING.values() 
-                    for variant in variants 
-                    if self._normalize_component(variant).lower() == req_norm))
+    def get_nearby_availability(self, lat: float, lon: float, radius_km: float, blood_group: str,
+                                component: str, limit: int = 10) -> Dict:
+        """Blood banks within radius_km of a point, across state and district lines"""
+        nearby_banks = []
+        for distance, state_key, district_key, bank in self.location_index.banks_near(
+                lat, lon, radius_km, component, limit):
+            bank_copy = bank.copy()
+            bank_copy.update({
+                "distance_km": round(distance, 2),
+                "state": state_key,
+                "district": district_key,
+                "availability_status": "Contact for current stock",
+                "requested_component": component,
+                "requested_blood_group": blood_group,
+                "last_updated": "Static data - verify availability by calling"
+            })
+            nearby_banks.append(bank_copy)
 
-    def get_blood_availability(self, state: str, district: str, blood_group: str, component: str) -> Dict:
-        """Main method to get blood availability with multiple strategies"""
-        logger.info(f"Blood availability request: {state}, {district}, {blood_group}, {component}")
-        
-        result = {
+        primary_result = {
+            "source": "fallback_database",
+            "search_mode": "nearby",
+            "blood_banks": nearby_banks,
+            "total_banks": len(nearby_banks),
+            "disclaimer": "This is static reference data. Please contact blood banks directly for real-time availability.",
+            "urgent_note": "For emergency needs, call multiple blood banks or visit hospitals directly."
+        }
+        if not nearby_banks:
+            primary_result["message"] = f"No blood banks with {component} within {radius_km} km"
+            primary_result["nearest_banks"] = [
+                {"name": bank["name"], "distance_km": round(distance, 2), "state": state_key, "district": district_key}
+                for distance, state_key, district_key, bank in self.location_index.nearest_banks(lat, lon)
+            ]
+
+        return {
             "request": {
-                "state": state,
-                "district": district,
+                "latitude": lat,
+                "longitude": lon,
+                "radius_km": radius_km,
                 "blood_group": blood_group,
                 "component": component,
                 "timestamp": datetime.now().isoformat()
             },
-            "strategies_attempted": []
+            "primary_result": primary_result
+        }
+
+    def _availability_key(self, state: str, district: str, blood_group: str, component: str) -> tuple:
+        """Normalized cache key for an availability lookup"""
+        return (
+            " ".join(state.lower().split()),
+            " ".join(district.lower().split()),
+            normalize_blood_group(blood_group),
+            normalize_component(component)
+        )
+
+    def get_blood_availability(self, state: str, district: str, blood_group: str, component: str) -> Dict:
+        """Blood availability served from the result cache, refreshing stale entries in the background"""
+        key = self._availability_key(state, district, blood_group, component)
+        lookup = self.availability_cache.get(key)
+
+        if lookup.status in (FRESH, STALE):
+            if lookup.status == STALE:
+                self._schedule_refresh(key, state, district, blood_group, component)
+            return self._with_cache_metadata(lookup.value, lookup.status, lookup.age)
+
+        try:
+            result, shared = self._inflight.do(
+                key,
+                lambda: self._fetch_and_cache(key, state, district, blood_group, component),
+                timeout=AVAILABILITY_WAIT_TIMEOUT
+            )
+        except SingleFlightTimeout:
+            logger.warning(f"Timed out waiting for in-flight lookup {key}, serving fallback data")
+            result = self._fetch_blood_availability(
+                state, district, blood_group, component,
+                skip_scraping_reason="Timed out waiting for in-flight lookup"
+            )
+            shared = False
+        return self._with_cache_metadata(result, lookup.status, 0.0, coalesced=shared)
+
+    def get_blood_availability_batch(self, queries: List[Dict], include_compatible: bool = False) -> Dict:
+        """Resolve many lookups concurrently; one failing query does not fail the batch"""
+        started = datetime.now()
+        expanded = []
+        for query in queries:
+            expanded.append(dict(query))
+            if include_compatible:
+                requested = normalize_blood_group(query["blood_group"])
+                for donor_group in compatible_donor_groups(requested):
+                    if donor_group != requested:
+                        expanded.append(dict(query, blood_group=donor_group, compatible_with=requested))
+
+        # Identical lookups (after normalization) are resolved once
+        futures = {}
+        entries = []
+        for query in expanded:
+            key = self._availability_key(query["state"], query["district"], query["blood_group"], query["component"])
+            duplicate = key in futures
+            if not duplicate:
+                futures[key] = self._batch_executor.submit(
+                    self.get_blood_availability,
+                    query["state"], query["district"], query["blood_group"], query["component"]
+                )
+            entries.append((query, key, duplicate))
+
+        wait(futures.values(), timeout=BATCH_DEADLINE)
+
+        results = []
+        for query, key, duplicate in entries:
+            future = futures[key]
+            entry = {"query": query, "deduplicated": duplicate}
+            if not future.done():
+                entry.update(success=False, error="Timed out waiting for lookup")
+            elif future.exception() is not None:
+                entry.update(success=False, error=str(future.exception()))
+            else:
+                entry.update(success=True, result=future.result())
+            results.append(entry)
+
+        succeeded = sum(1 for entry in results if entry["success"])
+        return {
+            "results": results,
+            "summary": {
+                "queries": len(queries),
+                "expanded_queries": len(expanded),
+                "unique_lookups": len(futures),
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "duration_seconds": round((datetime.now() - started).total_seconds(), 3)
+            }
+        }
+
+    def stream_blood_availability(self, state: str, district: str, blood_group: str, component: str) -> Iterator[Dict]:
+        """Progressive lookup events: the fallback directory result first, then each
+        strategy outcome as it completes, then the consolidated result.
+
+        Each event is {"event": "fallback" | "strategy" | "result", "data": ...}.
+        """
+        fallback_result = None
+        try:
+            fallback_result = self.get_fallback_data(state, district, blood_group, component)
+            yield {"event": "fallback", "data": fallback_result}
+        except Exception as e:
+            logger.error(f"Fallback lookup failed: {e}")
+
+        key = self._availability_key(state, district, blood_group, component)
+        lookup = self.availability_cache.get(key)
+        if lookup.status in (FRESH, STALE):
+            if lookup.status == STALE:
+                self._schedule_refresh(key, state, district, blood_group, component)
+            yield {"event": "result", "data": self._with_cache_metadata(lookup.value, lookup.status, lookup.age)}
+            return
+
+        skip_scraping_reason = None
+        if self._inflight.in_flight(key):
+            # Another request is already scraping this lookup; don't start a second one
+            skip_scraping_reason = "Identical lookup already in flight"
+
+        result = self._new_result(state, district, blood_group, component)
+        for strategy in self._iter_strategies(result, state, district, blood_group, component,
+                                              skip_scraping_reason, fallback_result):
+            yield {"event": "strategy", "data": strategy}
+
+        if not skip_scraping_reason:
+            self.availability_cache.set(key, result)
+        yield {"event": "result", "data": self._with_cache_metadata(result, lookup.status, 0.0)}
+
+    def _fetch_and_cache(self, key: tuple, state: str, district: str, blood_group: str, component: str) -> Dict:
+        result = self._fetch_blood_availability(state, district, blood_group, component)
+        self.availability_cache.set(key, result)
+        return result
+
+    def _with_cache_metadata(self, result: Dict, status: str, age: float, coalesced: bool = False) -> Dict:
+        response = dict(result)
+        response["cache"] = {
+            "status": status,
+            "age_seconds": round(age, 3),
+            "ttl_seconds": self.availability_cache.ttl,
+            "coalesced": coalesced
         }
+        return response
+
+    def _schedule_refresh(self, key: tuple, state: str, district: str, blood_group: str, component: str):
+        """Refresh a stale cache entry off the request thread"""
+        if self._inflight.in_flight(key):
+            return
+
+        def refresh():
+            try:
+                self._inflight.do(key, lambda: self._fetch_and_cache(key, state, district, blood_group, component))
+            except Exception as e:
+                logger.error(f"Background refresh failed for {key}: {e}")
+
+        self._refresh_executor.submit(refresh)
+
+    def _attempt_snapshot(self, result: Dict, state: str, district: str, blood_group: str, component: str) -> Optional[Dict]:
+        """Look the request up in the harvested snapshot, recording the attempt in result"""
+        try:
+            rows = self.snapshot_store.lookup(state, district, blood_group, component)
+        except Exception as e:
+            result["strategies_attempted"].append({
+                "strategy": "eraktkosh_snapshot",
+                "success": False,
+                "error": str(e)
+            })
+            return None
+        
+        if not rows:
+            result["strategies_attempted"].append({
+                "strategy": "eraktkosh_snapshot",
+                "success": False,
+                "reason": "No fresh snapshot rows for this location"
+            })
+            return None
         
-        # Strategy 1: Try eRaktKosh scraping
+        oldest = min(row.pop("fetched_at") for row in rows)
+        snapshot_result = {
+            "source": "eraktkosh_snapshot",
+            "results": {
+                "blood_banks": rows,
+                "total_found": len(rows),
+                "last_updated": datetime.fromtimestamp(oldest).isoformat()
+            }
+        }
+        result["strategies_attempted"].append({
+            "strategy": "eraktkosh_snapshot",
+            "success": True,
+            "data": snapshot_result
+        })
+        return snapshot_result
+
+    def _attempt_scraping(self, result: Dict, state: str, district: str, blood_group: str, component: str) -> Optional[Dict]:
+        """Run the scraping strategy, recording the attempt in result"""
         try:
             scrape_result = self.try_eraktkosh_scraping(state, district, blood_group, component)
-            if scrape_result and scrape_result.get("results"):
+            # A results table without rows is not an answer; let the fallback directory try
+            if scrape_result and scrape_result.get("results", {}).get("total_found"):
                 result["strategies_attempted"].append({
                     "strategy": "eraktkosh_scraping",
                     "success": True,
                     "data": scrape_result
                 })
-                result["primary_result"] = scrape_result
-                return result
+                return scrape_result
             else:
                 result["strategies_attempted"].append({
                     "strategy": "eraktkosh_scraping",
@@ -439,10 +687,66 @@ class BloodBankService:
                 "success": False,
                 "error": str(e)
             })
+        return None
+
+    def _new_result(self, state: str, district: str, blood_group: str, component: str) -> Dict:
+        return {
+            "request": {
+                "state": state,
+                "district": district,
+                "blood_group": blood_group,
+                "component": component,
+                "timestamp": datetime.now().isoformat()
+            },
+            "strategies_attempted": []
+        }
+
+    def _fetch_blood_availability(self, state: str, district: str, blood_group: str, component: str,
+                                  skip_scraping_reason: Optional[str] = None) -> Dict:
+        """Main method to get blood availability with multiple strategies"""
+        logger.info(f"Blood availability request: {state}, {district}, {blood_group}, {component}")
+        
+        result = self._new_result(state, district, blood_group, component)
+        for _ in self._iter_strategies(result, state, district, blood_group, component, skip_scraping_reason):
+            pass
+        return result
+
+    def _iter_strategies(self, result: Dict, state: str, district: str, blood_group: str, component: str,
+                         skip_scraping_reason: Optional[str] = None,
+                         fallback_result: Optional[Dict] = None) -> Iterator[Dict]:
+        """Run the strategies in order, yielding each strategies_attempted entry as it is recorded.
+
+        Sets result["primary_result"] from the first strategy that succeeds.
+        """
+        # Strategy 1: Answer from the harvested stock snapshot
+        snapshot_result = self._attempt_snapshot(result, state, district, blood_group, component)
+        yield result["strategies_attempted"][-1]
+        if snapshot_result:
+            result["primary_result"] = snapshot_result
+            return
+        
+        # Strategy 2: Try eRaktKosh scraping, unless the mirror's breaker is open
+        base_url = self.working_base_url
+        if not skip_scraping_reason and self.breakers.is_open(base_url):
+            skip_scraping_reason = f"Circuit breaker open for {self.breakers.for_url(base_url).host}"
+        if skip_scraping_reason:
+            result["strategies_attempted"].append({
+                "strategy": "eraktkosh_scraping",
+                "success": False,
+                "skipped": True,
+                "reason": skip_scraping_reason
+            })
+            yield result["strategies_attempted"][-1]
+        else:
+            scrape_result = self._attempt_scraping(result, state, district, blood_group, component)
+            yield result["strategies_attempted"][-1]
+            if scrape_result:
+                result["primary_result"] = scrape_result
+                return
         
-        # Strategy 2: Fallback to static data
+        # Strategy 3: Fallback to static data
         try:
-            fallback_result = self.get_fallback_data(state, district, blood_group, component)
+            fallback_result = fallback_result or self.get_fallback_data(state, district, blood_group, component)
             result["strategies_attempted"].append({
                 "strategy": "fallback_database",
                 "success": True,
@@ -472,5 +776,4 @@ class BloodBankService:
                     "Indian Red Cross": "011-23711551"
                 }
             }
-        
-        return result
\ No newline at end of file
+        yield result["strategies_attempted"][-1]
@@ -5,6 +5,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 import json
 from dataclasses import dataclass
+from .utils.blood_mappings import can_donate
+from .utils.normalization import extract_blood_group
 
 logger = logging.getLogger(__name__)
 
@@ -208,14 +210,7 @@ class AIChatbotService:
     def blood_bridge_coordination(self, query: str, blood_request: BloodRequest) -> Dict:
         """AI-powered blood bridge coordination system"""
         # Extract blood type and location from query if not provided
-        blood_type_patterns = [r'([ABO]+[+-])', r'(o\s*negative|o\s*positive|a\s*positive|b\s*positive|ab\s*positive)']
-        
-        extracted_blood_type = None
-        for pattern in blood_type_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                extracted_blood_type = match.group(1).upper().replace(' ', '')
-                break
+        extracted_blood_type = extract_blood_group(query)
         
         if extracted_blood_type:
             blood_request.blood_type = extracted_blood_type
@@ -528,11 +523,7 @@ class AIChatbotService:
     # Helper methods
     def extract_blood_type(self, query: str) -> Optional[str]:
         """Extract blood type from query"""
-        blood_types = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
-        for blood_type in blood_types:
-            if blood_type.lower() in query.lower():
-                return blood_type
-        return None
+        return extract_blood_group(query)
 
     def extract_location(self, query: str) -> Optional[str]:
         """Extract location from query"""
@@ -552,17 +543,7 @@ class AIChatbotService:
 
     def is_blood_compatible(self, donor_type: str, recipient_type: str) -> bool:
         """Check blood type compatibility"""
-        compatibility_map = {
-            'O-': ['O-', 'O+', 'A-', 'A+', 'B-', 'B+', 'AB-', 'AB+'],
-            'O+': ['O+', 'A+', 'B+', 'AB+'],
-            'A-': ['A-', 'A+', 'AB-', 'AB+'],
-            'A+': ['A+', 'AB+'],
-            'B-': ['B-', 'B+', 'AB-', 'AB+'],
-            'B+': ['B+', 'AB+'],
-            'AB-': ['AB-', 'AB+'],
-            'AB+': ['AB+']
-        }
-        return recipient_type in compatibility_map.get(donor_type, [])
+        return can_donate(donor_type, recipient_type)
 
     def calculate_donation_recency_score(self, last_donation: Optional[str]) -> float:
         """Calculate score based on donation recency"""
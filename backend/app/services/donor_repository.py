@@ -0,0 +1,185 @@
+"""SQLAlchemy-backed storage for donors and donation requests.
+
+Donor locations are stored with normalized city and state keys alongside
+the free-text ``location`` so that location filters are indexed equality
+lookups instead of substring scans. ``find_donors`` and
+``donor_statistics`` evaluate the search and statistics filters in SQL;
+by default DonorService answers both from its in-memory ``DonorIndex``
+instead, which picks up rows inserted or updated by any worker with
+``donors_changed_since``, and uses these queries when the in-memory index
+is disabled (DONOR_MEMORY_INDEX).
+"""
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, or_, select, true, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.donor import DonationRequest, Donor, DonorRevision
+from app.utils.database import SessionLocal, add_missing_columns
+from .utils.blood_mappings import parse_antigen_profile
+from .utils.location_index import location_keys
+
+logger = logging.getLogger(__name__)
+
+
+class DonorRepository:
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self.session_factory = session_factory
+        bind = session_factory.kw.get("bind")
+        if bind is not None:
+            # No-op when main.py's create_all already ran against the same engine
+            Donor.__table__.create(bind, checkfirst=True)
+            DonorRevision.__table__.create(bind, checkfirst=True)
+            DonationRequest.__table__.create(bind, checkfirst=True)
+            add_missing_columns(bind, Donor.__table__)
+        self._create_revision_counter()
+
+    def _create_revision_counter(self):
+        with self.session_factory() as session:
+            if session.get(DonorRevision, 1) is not None:
+                return
+            latest = session.scalar(select(func.coalesce(func.max(Donor.revision), 0)))
+            session.add(DonorRevision(id=1, value=latest))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker created it first
+                session.rollback()
+
+    def _next_revision(self, session: Session) -> int:
+        """Take the next revision; the counter stays locked until the session commits"""
+        session.execute(update(DonorRevision).where(DonorRevision.id == 1).values(value=DonorRevision.value + 1))
+        return session.scalar(select(DonorRevision.value).where(DonorRevision.id == 1))
+
+    # Donors
+
+    def count_donors(self) -> int:
+        with self.session_factory() as session:
+            return session.scalar(select(func.count()).select_from(Donor))
+
+    def add_donor(self, record: Dict) -> Dict:
+        city_key, state_key = location_keys(record["location"])
+        antigen_typed, antigen_positive = parse_antigen_profile(record.get("antigen_profile"))
+        donor = Donor(
+            name=record["name"],
+            blood_group=record["blood_group"],
+            location=record["location"],
+            city_key=city_key,
+            state_key=state_key,
+            phone=record["phone"],
+            email=record.get("email") or "",
+            age=record.get("age"),
+            weight=record.get("weight"),
+            medical_conditions=record.get("medical_conditions") or [],
+            antigen_typed=antigen_typed,
+            antigen_positive=antigen_positive,
+            last_donation=record.get("last_donation"),
+            eligible_next=date.fromisoformat(record["eligible_next"]),
+            status=record.get("status", "available"),
+            verified=record.get("verified", False),
+            donation_count=record.get("donation_count", 0)
+        )
+        with self.session_factory() as session:
+            # Before the insert, so that keys are also committed in increasing order
+            donor.revision = self._next_revision(session)
+            session.add(donor)
+            session.commit()
+            return donor.to_dict()
+
+    def seed_donors(self, records: Iterable[Dict]):
+        """Insert records only when the donor table is empty"""
+        if self.count_donors() == 0:
+            for record in records:
+                self.add_donor(record)
+
+    def donors_changed_since(self, revision: int) -> Tuple[int, List[Tuple[int, Dict]]]:
+        """Latest revision seen, and (key, record) for every donor inserted or updated after ``revision``, in key order"""
+        query = select(Donor).where(Donor.revision > revision).order_by(Donor.id).execution_options(yield_per=1000)
+        changed = []
+        with self.session_factory() as session:
+            for donor in session.scalars(query):
+                revision = max(revision, donor.revision)
+                changed.append((donor.id, donor.to_dict()))
+        return revision, changed
+
+    def _filters(self, blood_groups: Optional[List[str]], terms: List[str], urgency: Optional[str],
+                 eligible_by: Optional[date]) -> list:
+        conditions = []
+        if blood_groups is not None:
+            conditions.append(Donor.blood_group.in_(blood_groups))
+        if terms:
+            # Word prefix, like LocationVocabulary: "mumbai" finds "navi mumbai"
+            conditions.append(or_(*(
+                or_(column.startswith(term, autoescape=True), column.contains(f" {term}", autoescape=True))
+                for term in terms for column in (Donor.city_key, Donor.state_key)
+            )))
+        if urgency == "urgent":
+            conditions.append(or_(Donor.status == "available", Donor.eligible_next <= eligible_by))
+        elif urgency is not None and urgency != "emergency":
+            conditions.append(Donor.status == "available")
+        return conditions or [true()]
+
+    def find_donors(self, blood_groups: List[str], terms: List[str], urgency: str,
+                    eligible_by: date) -> List[Tuple[int, Dict]]:
+        """(key, record) of donors of the given groups whose city or state matches one of ``terms``.
+
+        Same location and urgency filters as DonorIndex.candidates.
+        """
+        query = select(Donor).where(*self._filters(blood_groups, terms, urgency, eligible_by)).order_by(Donor.id)
+        with self.session_factory() as session:
+            return [(donor.id, donor.to_dict()) for donor in session.scalars(query)]
+
+    def donor_statistics(self, terms: List[str]) -> Dict:
+        """Same shape as DonorStatistics.snapshot, aggregated in SQL"""
+        conditions = self._filters(None, terms, None, None)
+        counts = select(
+            Donor.blood_group,
+            func.count(),
+            func.sum(case((Donor.status == "available", 1), else_=0)),
+            func.sum(case((Donor.verified.is_(True), 1), else_=0))
+        ).where(*conditions).group_by(Donor.blood_group)
+        areas = select(Donor.location).where(*conditions).distinct()
+        with self.session_factory() as session:
+            rows = session.execute(counts).all()
+            coverage = session.scalars(areas).all()
+
+        distribution = {group: total for group, total, _, _ in rows}
+        return {
+            "total_donors": sum(distribution.values()),
+            "available_donors": sum(available or 0 for _, _, available, _ in rows),
+            "verified_donors": sum(verified or 0 for _, _, _, verified in rows),
+            "blood_group_distribution": distribution,
+            "coverage_areas": sorted(coverage)
+        }
+
+    def update_donor(self, key: int, **changes) -> Optional[Dict]:
+        """Apply column changes to one donor; None when the key does not exist"""
+        with self.session_factory() as session:
+            donor = session.get(Donor, key)
+            if donor is None:
+                return None
+            donor.revision = self._next_revision(session)
+            for column, value in changes.items():
+                setattr(donor, column, value)
+            session.commit()
+            return donor.to_dict()
+
+    # Donation requests
+
+    def add_request(self, record: Dict) -> Dict:
+        request = DonationRequest(**record)
+        with self.session_factory() as session:
+            session.add(request)
+            session.commit()
+            return request.to_dict()
+
+    def list_requests(self, status: Optional[str] = None) -> List[Dict]:
+        """All requests, or only those with the given status"""
+        query = select(DonationRequest).order_by(DonationRequest.id)
+        if status is not None:
+            query = query.where(DonationRequest.status == status)
+        with self.session_factory() as session:
+            return [request.to_dict() for request in session.scalars(query)]
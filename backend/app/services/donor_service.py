@@ -1,20 +1,55 @@
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 import json
-from .utils.blood_mappings import BLOOD_COMPATIBILITY, CAN_DONATE_TO
+import numpy as np
+from decouple import config
+from .utils.blood_mappings import (
+    antigen_names, compatible_donor_groups, format_antigen_profile, parse_antibodies, parse_antigen_profile
+)
+from .utils.normalization import normalize_blood_group
+from .utils.donor_index import DonorIndex
+from .utils.donor_stats import DonorStatistics
+from .utils.donor_table import DonorTable, Ranking
+from .utils.location_index import location_terms
+from .utils.result_cache import FRESH, TTLCache
+from .donor_repository import DonorRepository
 
 logger = logging.getLogger(__name__)
 
+DONOR_STATUSES = ["available", "not_available"]
+
+# Searches whose index postings cover more than 1/N of all donors are filtered with column masks instead
+BROAD_SEARCH_FRACTION = 20
+
+# Search and aggregate donors in memory; when off, every search and statistics call is a filtered SQL query
+DONOR_MEMORY_INDEX = config("DONOR_MEMORY_INDEX", default=True, cast=bool)
+
+# Scored match sets kept for paging; an entry is reused only until any donor changes
+RANKING_CACHE_TTL = config("DONOR_RANKING_CACHE_TTL", default=120, cast=float)
+RANKING_CACHE_MAX_ENTRIES = config("DONOR_RANKING_CACHE_MAX_ENTRIES", default=1024, cast=int)
+
 class DonorService:
-    def __init__(self):
-        # In-memory storage for demo (in production, use a database)
-        self.donors = []
-        self.donation_requests = []
+    def __init__(self, repository: Optional[DonorRepository] = None, memory_index: bool = DONOR_MEMORY_INDEX):
+        self.repository = repository or DonorRepository()
+        self.memory_index = memory_index
+        self.index = DonorIndex()
+        self.table = DonorTable()
+        self.statistics = DonorStatistics()
+        # Serializes reading changed rows and applying them to the statistics, index and table; requests
+        # run on a threadpool, and two syncs applying the same new row would count it twice
+        self._sync_lock = threading.RLock()
+        # Latest DonorRepository revision applied; below every stored one, so the first sync loads all donors
+        self._revision = -1
+        self._rankings = TTLCache(RANKING_CACHE_TTL, 0, RANKING_CACHE_MAX_ENTRIES)
+        # Bumped on every donor change; cached rankings from an older version are recomputed
+        self._version = 0
         self._initialize_sample_donors()
+        self._sync_index()
     
     def _initialize_sample_donors(self):
-        """Initialize with sample donor data for demo"""
+        """Seed sample donor data for demo into an empty donor table"""
         sample_donors = [
             {
                 "id": "D001",
@@ -83,62 +118,117 @@ class DonorService:
             }
         ]
         
-        self.donors.extend(sample_donors)
+        self.repository.seed_donors(sample_donors)
+    
+    def _sync_index(self):
+        """Apply donors inserted or updated since the last sync, including by other workers"""
+        if not self.memory_index:
+            return
+        with self._sync_lock:
+            self._revision, changed = self.repository.donors_changed_since(self._revision)
+            for key, donor in changed:
+                # This worker's own writes were applied when it made them
+                if self.index.get(key) != donor:
+                    self._apply(key, donor)
+    
+    def _apply(self, key: int, donor: Dict):
+        """Bring the index, table and statistics up to date with a donor's current record"""
+        if not self.memory_index:
+            return
+        with self._sync_lock:
+            self.statistics.replace(self.index.get(key), donor)
+            self.index.add(key, donor)
+            self.table.upsert(key, donor)
+            self._version += 1
+    
+    def _candidate_rows(self, blood_group: str, compatible_groups: List[str], location: str, urgency: str):
+        """Table rows of donors passing the blood group, location (city or state) and urgency filters.
+        
+        normal - available donors only; urgent - also donors eligible within 30 days;
+        emergency - all donors (they might make exception)
+        """
+        eligible_by = (datetime.now() + timedelta(days=30)).date()
+        if self.index.estimate(compatible_groups, location) * BROAD_SEARCH_FRACTION > len(self.table):
+            # Broad (regional) search: column masks over the whole table
+            return self.table.match(blood_group, location, urgency, eligible_by)
+        return self.table.rows_for(self.index.candidates(compatible_groups, location, urgency, eligible_by))
+    
+    def _candidates(self, blood_group: str, compatible_groups: List[str], location: str,
+                    urgency: str) -> Tuple[Callable[[int], Optional[Dict]], DonorTable, np.ndarray]:
+        """(donor lookup by key, table, candidate rows) for a search.
+        
+        Without the in-memory index the filters run in SQL and the matches
+        are loaded into a table of their own for ranking.
+        """
+        if self.memory_index:
+            return self.index.get, self.table, self._candidate_rows(blood_group, compatible_groups, location, urgency)
+        
+        eligible_by = (datetime.now() + timedelta(days=30)).date()
+        terms = location_terms(location) if location else []
+        donors = dict(self.repository.find_donors(compatible_groups, terms, urgency, eligible_by))
+        table = DonorTable()
+        for key in sorted(donors):
+            table.upsert(key, donors[key])
+        return donors.get, table, np.arange(len(table))
+    
+    def _ranking(self, blood_group: str, compatible_groups: List[str], location: str,
+                 urgency: str) -> Tuple[Ranking, Callable[[int], Optional[Dict]]]:
+        """Scored candidates for a search and a donor lookup by key.
+        
+        With the in-memory index, rankings are reused across pages until a donor changes.
+        """
+        if not self.memory_index:
+            lookup, table, rows = self._candidates(blood_group, compatible_groups, location, urgency)
+            return table.rank(rows, blood_group, location), lookup
+        
+        self._sync_index()
+        cache_key = (blood_group, location, urgency, date.today())
+        cached = self._rankings.get(cache_key)
+        if cached.status == FRESH and cached.value[0] == self._version:
+            return cached.value[1], self.index.get
+        
+        version = self._version
+        lookup, table, rows = self._candidates(blood_group, compatible_groups, location, urgency)
+        ranking = table.rank(rows, blood_group, location)
+        self._rankings.set(cache_key, (version, ranking))
+        return ranking, lookup
     
-    def find_donors(self, blood_group: str, location: str, urgency: str = "normal") -> Dict:
-        """Find potential donors based on criteria"""
+    def find_donors(self, blood_group: str, location: str, urgency: str = "normal",
+                    limit: Optional[int] = 10, offset: int = 0,
+                    after: Optional[Tuple[int, int, int]] = None) -> Dict:
+        """Find potential donors based on criteria, returning ``limit`` ranked donors.
+        
+        Donors are ordered by compatibility score, then donation count, then
+        donor key. ``after`` is the (score, donation_count, key) of the last
+        donor on the previous page; ``next_after`` in the result is the
+        position to pass for the following page, or None on the last page.
+        """
         logger.info(f"Finding donors: {blood_group}, {location}, urgency: {urgency}")
         
         # Normalize inputs
-        blood_group = blood_group.strip().upper()
-        location_parts = [part.strip().lower() for part in location.split(',')]
+        blood_group = normalize_blood_group(blood_group.strip().upper())
         
         # Get compatible blood groups
-        compatible_groups = BLOOD_COMPATIBILITY.get(blood_group, [blood_group])
+        compatible_groups = compatible_donor_groups(blood_group) or [blood_group]
         
-        # Find matching donors
-        matching_donors = []
-        for donor in self.donors:
-            # Check blood group compatibility
-            if donor["blood_group"] not in compatible_groups:
-                continue
-            
-            # Check location match (city or state)
-            donor_location = donor["location"].lower()
-            location_match = any(loc_part in donor_location for loc_part in location_parts)
-            
-            if not location_match:
-                continue
-            
-            # Check availability based on urgency
-            if urgency == "emergency":
-                # In emergency, include all donors (they might make exception)
-                pass
-            elif urgency == "urgent":
-                # Include available donors and those becoming eligible within 30 days
-                if donor["status"] != "available":
-                    eligible_date = datetime.strptime(donor["eligible_next"], "%Y-%m-%d")
-                    if eligible_date > datetime.now() + timedelta(days=30):
-                        continue
-            else:  # normal
-                # Only available donors
-                if donor["status"] != "available":
-                    continue
-            
-            # Calculate compatibility score
+        ranking, lookup = self._ranking(blood_group, compatible_groups, location, urgency)
+        
+        # Only the requested page is selected and materialized
+        positions, remaining = ranking.page(offset + limit if limit is not None else None, after)
+        positions = positions[offset:]
+        
+        page = []
+        for position in positions:
+            donor = lookup(int(ranking.keys[position]))
             donor_copy = donor.copy()
-            donor_copy["compatibility_score"] = self._calculate_compatibility_score(
-                donor["blood_group"], blood_group, donor["location"], location
-            )
+            donor_copy["compatibility_score"] = int(ranking.scores[position])
             
             # Add urgency context
             donor_copy["urgency_context"] = self._get_urgency_context(donor, urgency)
             
-            matching_donors.append(donor_copy)
-        
-        # Sort by compatibility score and donation history
-        matching_donors.sort(key=lambda d: (d["compatibility_score"], d["donation_count"]), reverse=True)
+            page.append(donor_copy)
         
+        more = len(positions) > 0 and offset + len(positions) < remaining
         return {
             "request": {
                 "blood_group": blood_group,
@@ -147,37 +237,64 @@ class DonorService:
                 "timestamp": datetime.now().isoformat()
             },
             "compatible_blood_groups": compatible_groups,
-            "donors_found": len(matching_donors),
-            "donors": matching_donors[:10],  # Return top 10
+            "donors_found": len(ranking),
+            "donors": page,
+            "next_after": ranking.position(positions[-1]) if more else None,
             "search_tips": self._get_search_tips(blood_group, urgency),
             "emergency_alternatives": self._get_emergency_alternatives(blood_group) if urgency == "emergency" else None
         }
     
-    def _calculate_compatibility_score(self, donor_bg: str, requested_bg: str, donor_loc: str, requested_loc: str) -> int:
-        """Calculate compatibility score for ranking"""
-        score = 0
+    def find_phenotype_matches(self, blood_group: str, location: str, antibodies: Optional[str] = None,
+                               patient_antigens: Optional[str] = None, urgency: str = "normal",
+                               limit: int = 10) -> Dict:
+        """Find donors matched beyond ABO/RhD for a chronically transfused patient.
         
-        # Blood group matching (higher score for exact match)
-        if donor_bg == requested_bg:
-            score += 100
-        elif donor_bg in BLOOD_COMPATIBILITY.get(requested_bg, []):
-            score += 50
+        Donors must be typed negative for every antigen the patient has
+        antibodies against; among those, donors exposing the patient to the
+        fewest Rh/Kell antigens they lack rank first. Raises ValueError for
+        unparseable antigen notation.
+        """
+        logger.info(f"Finding phenotype-matched donors: {blood_group}, {location}, antibodies: {antibodies}")
         
-        # Location matching
-        donor_parts = donor_loc.lower().split(', ')
-        requested_parts = requested_loc.lower().split(', ')
+        blood_group = normalize_blood_group(blood_group.strip().upper())
+        antibody_mask = parse_antibodies(antibodies)
+        patient_typed, patient_positive = parse_antigen_profile(patient_antigens)
+        compatible_groups = compatible_donor_groups(blood_group) or [blood_group]
         
-        # Exact city match
-        if len(donor_parts) > 0 and len(requested_parts) > 0:
-            if donor_parts[0] == requested_parts[0]:
-                score += 30
+        self._sync_index()
+        lookup, table, rows = self._candidates(blood_group, compatible_groups, location, urgency)
+        keys, scores, exposures, donors_found = table.rank_phenotype(
+            rows, blood_group, location, antibody_mask, patient_typed, patient_positive, limit
+        )
         
-        # State match
-        if len(donor_parts) > 1 and len(requested_parts) > 1:
-            if donor_parts[1] == requested_parts[1]:
-                score += 20
+        donors = []
+        for key, score, exposure in zip(keys, scores, exposures):
+            donor = lookup(key)
+            donor_copy = donor.copy()
+            donor_copy["compatibility_score"] = score
+            donor_copy["antigen_exposures"] = antigen_names(exposure)
+            donor_copy["urgency_context"] = self._get_urgency_context(donor, urgency)
+            donors.append(donor_copy)
         
-        return score
+        return {
+            "request": {
+                "blood_group": blood_group,
+                "location": location,
+                "urgency": urgency,
+                "antibodies": antigen_names(antibody_mask),
+                "patient_antigens": format_antigen_profile(patient_typed, patient_positive),
+                "timestamp": datetime.now().isoformat()
+            },
+            "compatible_blood_groups": compatible_groups,
+            "candidates_screened": len(rows),
+            "donors_found": donors_found,
+            "donors": donors,
+            "matching_notes": [
+                "Donors are typed negative for every antigen the patient has antibodies against",
+                "antigen_exposures lists Rh/Kell antigens the patient lacks that the donor carries or was not typed for",
+                "Confirm with crossmatch before transfusion"
+            ]
+        }
     
     def _get_urgency_context(self, donor: Dict, urgency: str) -> Dict:
         """Get context information based on urgency"""
@@ -241,7 +358,7 @@ class DonorService:
     def _get_emergency_alternatives(self, blood_group: str) -> Dict:
         """Get emergency alternatives and contacts"""
         return {
-            "compatible_groups": BLOOD_COMPATIBILITY.get(blood_group, [blood_group]),
+            "compatible_groups": compatible_donor_groups(blood_group) or [blood_group],
             "emergency_contacts": {
                 "National Blood Helpline": "1910",
                 "Red Cross Blood Bank": "011-23711551",
@@ -268,14 +385,18 @@ class DonorService:
                         "required_fields": required_fields
                     }
             
-            # Generate donor ID
-            donor_id = f"D{len(self.donors) + 1:03d}"
+            try:
+                parse_antigen_profile(donor_data.get("antigen_profile"))
+            except ValueError as e:
+                return {
+                    "success": False,
+                    "error": f"Invalid antigen_profile: {e}"
+                }
             
             # Create donor record
             new_donor = {
-                "id": donor_id,
                 "name": donor_data["name"],
-                "blood_group": donor_data["blood_group"].strip().upper(),
+                "blood_group": normalize_blood_group(donor_data["blood_group"].strip().upper()),
                 "location": donor_data["location"],
                 "phone": donor_data["phone"],
                 "email": donor_data.get("email", ""),
@@ -283,15 +404,17 @@ class DonorService:
                 "weight": donor_data.get("weight"),
                 "last_donation": donor_data.get("last_donation"),
                 "medical_conditions": donor_data.get("medical_conditions", []),
+                "antigen_profile": donor_data.get("antigen_profile"),
                 "status": "available" if not donor_data.get("last_donation") else self._calculate_status(donor_data.get("last_donation")),
                 "verified": False,  # Needs verification
                 "donation_count": 0,
-                "registration_date": datetime.now().isoformat(),
                 "eligible_next": self._calculate_next_eligible_date(donor_data.get("last_donation"))
             }
             
-            # Add to donor list
-            self.donors.append(new_donor)
+            # Persist; the database assigns the donor ID
+            new_donor = self.repository.add_donor(new_donor)
+            donor_id = new_donor["id"]
+            self._sync_index()
             
             return {
                 "success": True,
@@ -351,12 +474,9 @@ class DonorService:
     def create_donation_request(self, request_data: dict) -> Dict:
         """Create a new blood donation request"""
         try:
-            request_id = f"R{len(self.donation_requests) + 1:03d}"
-            
             new_request = {
-                "id": request_id,
                 "patient_name": request_data.get("patient_name", "Anonymous"),
-                "blood_group": request_data["blood_group"].strip().upper(),
+                "blood_group": normalize_blood_group(request_data["blood_group"].strip().upper()),
                 "location": request_data["location"],
                 "urgency": request_data.get("urgency", "normal"),
                 "hospital": request_data.get("hospital", ""),
@@ -367,11 +487,11 @@ class DonorService:
                 "needed_by": request_data.get("needed_by", ""),
                 "additional_info": request_data.get("additional_info", ""),
                 "status": "active",
-                "created_date": datetime.now().isoformat(),
                 "responses": []
             }
             
-            self.donation_requests.append(new_request)
+            new_request = self.repository.add_request(new_request)
+            request_id = new_request["id"]
             
             # Find potential donors
             donors_result = self.find_donors(
@@ -408,44 +528,66 @@ class DonorService:
     
     def get_donor_statistics(self, location: str = None) -> Dict:
         """Get donor statistics"""
-        total_donors = len(self.donors)
-        
-        if location:
-            location_donors = [d for d in self.donors if location.lower() in d["location"].lower()]
-            stats_donors = location_donors
+        if self.memory_index:
+            self._sync_index()
+            stats = self.statistics.snapshot(location)
         else:
-            stats_donors = self.donors
-        
-        # Blood group distribution
-        blood_groups = {}
-        available_donors = 0
-        verified_donors = 0
-        
-        for donor in stats_donors:
-            bg = donor["blood_group"]
-            blood_groups[bg] = blood_groups.get(bg, 0) + 1
-            
-            if donor["status"] == "available":
-                available_donors += 1
-            if donor["verified"]:
-                verified_donors += 1
+            stats = self.repository.donor_statistics(location_terms(location) if location else [])
         
         return {
-            "total_donors": len(stats_donors),
-            "available_donors": available_donors,
-            "verified_donors": verified_donors,
-            "blood_group_distribution": blood_groups,
+            "total_donors": stats["total_donors"],
+            "available_donors": stats["available_donors"],
+            "verified_donors": stats["verified_donors"],
+            "blood_group_distribution": stats["blood_group_distribution"],
             "location_filter": location,
             "statistics_date": datetime.now().isoformat(),
-            "coverage_areas": list(set(d["location"] for d in stats_donors))
+            "coverage_areas": stats["coverage_areas"]
+        }
+    
+    def update_donor_status(self, donor_id: str, status: Optional[str] = None,
+                            verified: Optional[bool] = None) -> Dict:
+        """Change a donor's availability and/or verification"""
+        if status is not None and status not in DONOR_STATUSES:
+            return {
+                "success": False,
+                "error": f"Invalid status: {status}",
+                "allowed_statuses": DONOR_STATUSES
+            }
+        
+        changes = {}
+        if status is not None:
+            changes["status"] = status
+        if verified is not None:
+            changes["verified"] = verified
+        
+        key = int(donor_id[1:]) if donor_id[:1].upper() == "D" and donor_id[1:].isdigit() else None
+        self._sync_index()
+        # Held across the write so that concurrent updates reach memory in the order they were committed
+        with self._sync_lock:
+            donor = self.repository.update_donor(key, **changes) if key is not None else None
+            if donor is not None:
+                self._apply(key, donor)
+        if donor is None:
+            return {
+                "success": False,
+                "error": f"Donor not found: {donor_id}"
+            }
+        
+        return {
+            "success": True,
+            "message": "Donor status updated",
+            "donor_info": {
+                "id": donor["id"],
+                "name": donor["name"],
+                "blood_group": donor["blood_group"],
+                "status": donor["status"],
+                "verified": donor["verified"]
+            }
         }
     
     def get_donation_requests(self, status: str = "active") -> Dict:
         """Get donation requests"""
-        if status == "all":
-            requests = self.donation_requests
-        else:
-            requests = [r for r in self.donation_requests if r["status"] == status]
+        requests = self.repository.list_requests(None if status == "all" else status)
         
         return {
             "total_requests": len(requests),
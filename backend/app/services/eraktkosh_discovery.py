@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+
+import requests
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIRROR_URLS = [
+    "https://eraktkosh.mohfw.gov.in",
+    "https://eraktkosh.mohfw.gov.in/eraktkoshPortal",
+    "https://www.eraktkosh.in"
+]
+
+PROBE_TIMEOUT = config("ERAKTKOSH_PROBE_TIMEOUT", default=10, cast=float)
+PROBE_INTERVAL = config("ERAKTKOSH_PROBE_INTERVAL", default=300, cast=float)
+RETRY_INTERVAL = config("ERAKTKOSH_RETRY_INTERVAL", default=60, cast=float)
+SLOW_RESPONSE_SECONDS = config("ERAKTKOSH_SLOW_RESPONSE_SECONDS", default=5, cast=float)
+
+
+class MirrorHealth(Enum):
+    UNKNOWN = "unknown"
+    HEALTHY = "healthy"
+    DEGRADED = "degraded"
+    DOWN = "down"
+
+
+class MirrorDiscovery:
+    """Background discovery of a reachable eRaktKosh mirror.
+
+    Probing never happens on construction. The FastAPI lifespan starts a
+    task that probes the mirrors off the event loop and re-probes on a
+    schedule; until a mirror is confirmed, ``working_base_url`` is None and
+    callers serve fallback data.
+    """
+
+    def __init__(self, session: requests.Session, mirror_urls: Optional[List[str]] = None):
+        self.session = session
+        self.mirror_urls = mirror_urls or DEFAULT_MIRROR_URLS
+        self.health = MirrorHealth.UNKNOWN
+        self.base_url = None
+        self.last_probe = None
+        self.last_latency = None
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._task = None
+
+    @property
+    def working_base_url(self) -> Optional[str]:
+        """Mirror to scrape from, only once one has been confirmed reachable"""
+        if self.health in (MirrorHealth.HEALTHY, MirrorHealth.DEGRADED):
+            return self.base_url
+        return None
+
+    def probe(self) -> MirrorHealth:
+        """Probe each mirror in order and record the resulting health"""
+        for index, url in enumerate(self.mirror_urls):
+            started = time.monotonic()
+            try:
+                resp = self.session.get(url, timeout=PROBE_TIMEOUT)
+            except Exception as e:
+                logger.debug(f"Mirror {url} failed: {e}")
+                continue
+
+            latency = time.monotonic() - started
+            if resp.status_code == 200 and len(resp.text) > 100:
+                # Only the primary mirror answering promptly counts as healthy
+                if index == 0 and latency < SLOW_RESPONSE_SECONDS:
+                    health = MirrorHealth.HEALTHY
+                else:
+                    health = MirrorHealth.DEGRADED
+                self._record(health, url, latency)
+                return health
+
+        self._record(MirrorHealth.DOWN, None, None)
+        return MirrorHealth.DOWN
+
+    def _record(self, health: MirrorHealth, url: Optional[str], latency: Optional[float]):
+        with self._lock:
+            previous = self.health
+            self.health = health
+            self.base_url = url
+            self.last_latency = latency
+            self.last_probe = datetime.now()
+            if health == MirrorHealth.DOWN:
+                self.consecutive_failures += 1
+            else:
+                self.consecutive_failures = 0
+
+        if health != previous:
+            if url:
+                logger.info(f"eRaktKosh mirror {health.value}: {url}")
+            else:
+                logger.warning("No working eRaktKosh URL found, using fallback data only")
+
+    def next_interval(self) -> float:
+        """Seconds until the next scheduled probe"""
+        if self.health == MirrorHealth.HEALTHY:
+            return PROBE_INTERVAL
+        return RETRY_INTERVAL
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.probe)
+            except Exception as e:
+                logger.error(f"Mirror discovery error: {e}")
+            await asyncio.sleep(self.next_interval())
+
+    def start(self):
+        """Start the background probe loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background probe loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict:
+        """Current discovery state for diagnostics"""
+        with self._lock:
+            return {
+                "health": self.health.value,
+                "working_base_url": self.working_base_url,
+                "last_probe": self.last_probe.isoformat() if self.last_probe else None,
+                "last_latency_seconds": round(self.last_latency, 3) if self.last_latency is not None else None,
+                "consecutive_failures": self.consecutive_failures,
+                "next_probe_in_seconds": self.next_interval()
+            }
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Coroutine, Dict, Optional
+
+import httpx
+from decouple import config
+
+from .utils.circuit_breaker import BreakerRegistry, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_MAX_CONNECTIONS = config("SCRAPE_MAX_CONNECTIONS", default=20, cast=int)
+SCRAPE_MAX_KEEPALIVE = config("SCRAPE_MAX_KEEPALIVE", default=10, cast=int)
+SCRAPE_REQUEST_TIMEOUT = config("SCRAPE_REQUEST_TIMEOUT", default=10, cast=float)
+
+
+class AsyncScrapeEngine:
+    """Pooled async HTTP client for upstream scraping.
+
+    The engine owns an event loop on a daemon thread so that one
+    keep-alive connection pool is shared by every caller, including sync
+    FastAPI handlers running on the threadpool. Callers submit coroutines
+    with ``run``; coroutines use ``get``/``post`` for HTTP.
+
+    Every request goes through the per-host circuit breaker in
+    ``breakers``: an open breaker raises CircuitOpenError without touching
+    the network, and the request timeout follows the host's observed p95.
+    ``probe`` is the exception, for diagnostics that must reach the host
+    whatever its breaker says.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None,
+                 max_connections: int = SCRAPE_MAX_CONNECTIONS,
+                 max_keepalive: int = SCRAPE_MAX_KEEPALIVE,
+                 timeout: float = SCRAPE_REQUEST_TIMEOUT,
+                 breakers: Optional[BreakerRegistry] = None):
+        self.headers = headers or {}
+        self.breakers = breakers or BreakerRegistry()
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive
+        )
+        self.timeout = timeout
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="scrape-engine", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared client; only valid inside coroutines run by this engine"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True
+            )
+        return self._client
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the engine loop and wait for its result"""
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        breaker = self.breakers.for_url(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {breaker.host}")
+
+        kwargs.setdefault("timeout", breaker.timeout())
+        started = time.monotonic()
+        try:
+            resp = await self.client.request(method, url, **kwargs)
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception:
+            # Not only httpx.HTTPError: InvalidURL, TLS and decoding errors must also release a half-open probe
+            breaker.record_failure()
+            raise
+
+        if resp.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success(time.monotonic() - started)
+        return resp
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def probe(self, url: str, **kwargs) -> httpx.Response:
+        """GET that neither consults nor updates the host's circuit breaker"""
+        return await self.client.get(url, **kwargs)
+
+    def close(self):
+        """Close the connection pool and stop the engine loop"""
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def shutdown():
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+        except Exception as e:
+            logger.debug(f"Scrape engine shutdown error: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
@@ -0,0 +1,267 @@
+"""Scheduled bulk harvest of eRaktKosh stock into a local SQLite snapshot.
+
+The harvester walks the state and district dropdowns served by
+``stateBloodBanks.cnt`` (``stateCode=0`` lists states, a state code lists
+its districts) and fetches the ``stockAvailability.cnt`` result table for
+every district, using the ``abfhttf`` page token seen in
+debug_eraktkosh.py. Rows are normalized to one row per blood bank, blood
+group and component and written with the time they were fetched, so
+``/blood-availability`` can answer locally and scrape only to refresh.
+"""
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from decouple import config
+
+from .utils.html_parsing import parse_document, parse_result_tables
+from .utils.location_index import normalize_location
+from .utils.normalization import compatible_components, normalize_blood_group, normalize_component
+from .eraktkosh_discovery import RETRY_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DATABASE = config("STOCK_SNAPSHOT_DATABASE", default="./eraktkosh_snapshot.db")
+SNAPSHOT_MAX_AGE = config("STOCK_SNAPSHOT_MAX_AGE", default=6 * 3600, cast=float)
+HARVEST_ENABLED = config("STOCK_HARVEST_ENABLED", default=True, cast=bool)
+HARVEST_INTERVAL = config("STOCK_HARVEST_INTERVAL", default=3600, cast=float)
+HARVEST_CONCURRENCY = config("STOCK_HARVEST_CONCURRENCY", default=4, cast=int)
+HARVEST_DEADLINE = config("STOCK_HARVEST_DEADLINE", default=1800, cast=float)
+
+STATES_PATH = config("ERAKTKOSH_STATES_PATH", default="/BLDAHIMS/bloodbank/stateBloodBanks.cnt")
+STOCK_PATH = config("ERAKTKOSH_STOCK_PATH", default="/BLDAHIMS/bloodbank/stockAvailability.cnt")
+
+TOKEN_PATTERN = re.compile(r"abfhttf=([a-zA-Z0-9]+)")
+# "A+Ve : 4", "AB-:0", "O Positive - 12"
+STOCK_ENTRY_PATTERN = re.compile(
+    r"(AB|A|B|O)\s*(\+\s*VE|-\s*VE|\+|-|POSITIVE|NEGATIVE|POS|NEG)\s*[:=\-]\s*(\d+)",
+    re.IGNORECASE
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock_snapshot (
+    state TEXT NOT NULL,
+    district TEXT NOT NULL,
+    state_key TEXT NOT NULL,
+    district_key TEXT NOT NULL,
+    blood_bank TEXT NOT NULL,
+    category TEXT,
+    blood_group TEXT NOT NULL,
+    component TEXT NOT NULL,
+    units INTEGER,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_stock_snapshot_lookup
+    ON stock_snapshot (state_key, district_key, blood_group, component);
+"""
+
+
+class StockSnapshotStore:
+    """SQLite table of harvested stock rows with per-row fetch timestamps"""
+
+    def __init__(self, path: str = SNAPSHOT_DATABASE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def replace_district(self, state: str, district: str, rows: List[Dict], fetched_at: float):
+        """Atomically swap a district's rows for a fresh harvest"""
+        state_key, district_key = normalize_location(state), normalize_location(district)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM stock_snapshot WHERE state_key = ? AND district_key = ?",
+                (state_key, district_key)
+            )
+            self._conn.executemany(
+                "INSERT INTO stock_snapshot (state, district, state_key, district_key, blood_bank, category,"
+                " blood_group, component, units, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (state, district, state_key, district_key, row["blood_bank"], row.get("category"),
+                     row["blood_group"], row["component"], row.get("units"), fetched_at)
+                    for row in rows
+                ]
+            )
+
+    def lookup(self, state: str, district: str, blood_group: str, component: str,
+               max_age: float = SNAPSHOT_MAX_AGE) -> List[Dict]:
+        """Rows for a lookup fetched within ``max_age`` seconds"""
+        components = sorted(compatible_components(component)) or [normalize_component(component)]
+        placeholders = ", ".join("?" for _ in components)
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT state, district, blood_bank, category, blood_group, component, units, fetched_at"
+                " FROM stock_snapshot WHERE state_key = ? AND district_key = ? AND blood_group = ?"
+                f" AND component IN ({placeholders}) AND fetched_at >= ? ORDER BY units DESC",
+                (normalize_location(state), normalize_location(district), normalize_blood_group(blood_group),
+                 *components, time.time() - max_age)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS rows_count, COUNT(DISTINCT state_key || '/' || district_key) AS districts,"
+                " MIN(fetched_at) AS oldest, MAX(fetched_at) AS newest FROM stock_snapshot"
+            ).fetchone()
+        return {
+            "rows": row["rows_count"],
+            "districts": row["districts"],
+            "oldest": datetime.fromtimestamp(row["oldest"]).isoformat() if row["oldest"] else None,
+            "newest": datetime.fromtimestamp(row["newest"]).isoformat() if row["newest"] else None
+        }
+
+
+def parse_options(html: str) -> List[Tuple[str, str]]:
+    """(code, name) pairs of the numeric <option>s in a dropdown response"""
+    doc = parse_document(html)
+    if doc is None:
+        return []
+    options = []
+    for option in doc.iter('option'):
+        value = (option.get('value') or '').strip()
+        name = option.text_content().strip()
+        if value.isdigit() and int(value) > 0 and name:
+            options.append((value, name))
+    return options
+
+
+def normalize_stock_rows(table_rows: List[Dict[str, str]]) -> List[Dict]:
+    """One row per blood bank, blood group and component from parsed result tables"""
+    rows = []
+    for table_row in table_rows:
+        bank = next((value for header, value in table_row.items()
+                     if 'bank' in header or 'hospital' in header), None)
+        availability = next((value for header, value in table_row.items()
+                             if 'availab' in header or 'stock' in header), '')
+        component = next((value for header, value in table_row.items() if 'component' in header), 'Whole Blood')
+        category = next((value for header, value in table_row.items() if 'category' in header), None)
+        if not bank:
+            continue
+
+        for group, sign, units in STOCK_ENTRY_PATTERN.findall(availability):
+            rows.append({
+                "blood_bank": bank,
+                "category": category,
+                "blood_group": group.upper() + ("+" if sign.upper().startswith(("+", "POS")) else "-"),
+                "component": normalize_component(component),
+                "units": int(units)
+            })
+    return rows
+
+
+class StockHarvester:
+    """Walks every state and district on a schedule and refreshes the snapshot"""
+
+    def __init__(self, engine, store: StockSnapshotStore, discovery,
+                 concurrency: int = HARVEST_CONCURRENCY, interval: float = HARVEST_INTERVAL):
+        self.engine = engine
+        self.store = store
+        self.discovery = discovery
+        self.concurrency = concurrency
+        self.interval = interval
+        self.last_run: Optional[Dict] = None
+        self._task = None
+
+    async def harvest(self, base_url: str) -> Dict:
+        """Harvest every district reachable from ``base_url`` into the store"""
+        parts = urlsplit(base_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+        summary = {"states": 0, "districts": 0, "rows": 0, "failed_districts": 0}
+
+        async def fetch(url: str, params: Optional[Dict] = None) -> str:
+            async with semaphore:
+                resp = await self.engine.get(url, params=params)
+            resp.raise_for_status()
+            return resp.text
+
+        token_match = TOKEN_PATTERN.search(await fetch(origin + STOCK_PATH))
+        token = token_match.group(1) if token_match else None
+
+        states = parse_options(await fetch(origin + STATES_PATH, {"stateCode": 0}))
+        summary["states"] = len(states)
+
+        async def harvest_district(state: Tuple[str, str], district: Tuple[str, str]):
+            params = {"stateCode": state[0], "districtCode": district[0], "bloodGroup": "all", "bloodComponent": "all"}
+            if token:
+                params["abfhttf"] = token
+            try:
+                html = await fetch(origin + STOCK_PATH, params)
+                # Parsing and the sqlite write would otherwise stall every lookup sharing the scrape loop
+                stored = await asyncio.to_thread(self._store_district, state[1], district[1], html)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Harvest failed for {district[1]}, {state[1]}: {e!r}")
+                summary["failed_districts"] += 1
+                return
+            summary["districts"] += 1
+            summary["rows"] += stored
+
+        async def harvest_state(state: Tuple[str, str]):
+            try:
+                districts = parse_options(await fetch(origin + STATES_PATH, {"stateCode": state[0]}))
+            except Exception as e:
+                logger.debug(f"District list failed for {state[1]}: {e}")
+                return
+            await asyncio.gather(*(harvest_district(state, district) for district in districts), return_exceptions=True)
+
+        # One state's failure must not abort the rest of the pass
+        outcomes = await asyncio.gather(*(harvest_state(state) for state in states), return_exceptions=True)
+        for state, outcome in zip(states, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Harvest failed for {state[1]}: {outcome!r}")
+        summary["duration_seconds"] = round(time.monotonic() - started, 3)
+        summary["finished_at"] = datetime.now().isoformat()
+        return summary
+
+    def _store_district(self, state: str, district: str, html: str) -> int:
+        """Parse a district's stock page into the store; returns the number of rows stored"""
+        rows = normalize_stock_rows(parse_result_tables(html))
+        self.store.replace_district(state, district, rows, time.time())
+        return len(rows)
+
+    def run_once(self) -> Optional[Dict]:
+        """Harvest from the confirmed mirror, if there is one"""
+        base_url = self.discovery.working_base_url
+        if not base_url:
+            return None
+        summary = self.engine.run(self.harvest(base_url), timeout=HARVEST_DEADLINE)
+        logger.info(f"Stock harvest complete: {summary}")
+        self.last_run = summary
+        return summary
+
+    async def _run(self):
+        while True:
+            summary = None
+            try:
+                summary = await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Stock harvest error: {e!r}")
+            # Without a confirmed mirror, check again on the discovery retry schedule
+            await asyncio.sleep(self.interval if summary else RETRY_INTERVAL)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,4 +1,8 @@
 """Blood group and component mappings for standardization"""
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 BLOOD_GROUP_MAPPING = {
     "A+": ["A+Ve", "A+", "A POSITIVE", "A POS", "A+VE", "APOSITIVE"],
@@ -31,26 +35,142 @@ COMPONENT_MAPPING = {
     ]
 }
 
-# Blood compatibility for emergency situations
-BLOOD_COMPATIBILITY = {
-    "A+": ["A+", "A-", "O+", "O-"],
-    "A-": ["A-", "O-"],
-    "B+": ["B+", "B-", "O+", "O-"],
-    "B-": ["B-", "O-"],
-    "AB+": ["AB+", "AB-", "A+", "A-", "B+", "B-", "O+", "O-"],  # Universal recipient
-    "AB-": ["AB-", "A-", "B-", "O-"],
-    "O+": ["O+", "O-"],
-    "O-": ["O-"]  # Universal donor
+# Blood compatibility as bitmasks.
+#
+# A group's code is its antigen set: bit 0 = RhD, bit 1 = B, bit 2 = A, so
+# O- = 0 ... AB+ = 7. A donor is compatible with a recipient when the donor
+# carries no antigen the recipient lacks, i.e. donor & ~recipient == 0.
+# RECEIVES_FROM[r] / DONATES_TO[d] hold that relation as 8-bit masks with one
+# bit per group code. Anything that is not one of the eight groups gets
+# UNKNOWN_GROUP, which the masks never contain.
+RH_D, ANTIGEN_B, ANTIGEN_A = 1, 2, 4
+
+BLOOD_GROUP_CODES = {
+    "O-": 0, "O+": RH_D,
+    "B-": ANTIGEN_B, "B+": ANTIGEN_B | RH_D,
+    "A-": ANTIGEN_A, "A+": ANTIGEN_A | RH_D,
+    "AB-": ANTIGEN_A | ANTIGEN_B, "AB+": ANTIGEN_A | ANTIGEN_B | RH_D
 }
+BLOOD_GROUPS_BY_CODE = sorted(BLOOD_GROUP_CODES, key=BLOOD_GROUP_CODES.get)
+UNKNOWN_GROUP = len(BLOOD_GROUP_CODES)
+
+RECEIVES_FROM = [sum(1 << donor for donor in range(8) if donor & ~recipient == 0) for recipient in range(8)] + [0]
+DONATES_TO = [sum(1 << recipient for recipient in range(8) if donor & ~recipient == 0) for donor in range(8)] + [0]
+
+# Listing orders used in responses
+_DONOR_LIST_ORDER = BLOOD_GROUPS_BY_CODE[::-1]  # closest match first: AB+, AB-, A+, A-, B+, B-, O+, O-
+_RECIPIENT_LIST_ORDER = ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"]
+
+
+def blood_group_code(group: str) -> int:
+    return BLOOD_GROUP_CODES.get(group, UNKNOWN_GROUP)
+
+
+def can_donate(donor_group: str, recipient_group: str) -> bool:
+    """Single-pair check: is donor_group compatible with recipient_group"""
+    return bool(RECEIVES_FROM[blood_group_code(recipient_group)] >> blood_group_code(donor_group) & 1)
+
+
+def groups_in_mask(mask: int, order: List[str] = BLOOD_GROUPS_BY_CODE) -> List[str]:
+    return [group for group in order if mask >> BLOOD_GROUP_CODES[group] & 1]
+
+
+def compatible_donor_groups(recipient_group: str) -> List[str]:
+    """Groups that can donate to recipient_group, closest match first"""
+    return groups_in_mask(RECEIVES_FROM[blood_group_code(recipient_group)], _DONOR_LIST_ORDER)
+
+
+def compatible_recipient_groups(donor_group: str) -> List[str]:
+    """Groups that donor_group can donate to"""
+    return groups_in_mask(DONATES_TO[blood_group_code(donor_group)], _RECIPIENT_LIST_ORDER)
+
+
+def compatible_donor_codes(codes: np.ndarray, recipient_group: str) -> np.ndarray:
+    """Boolean mask over an array of group codes: which can donate to recipient_group"""
+    recipient = blood_group_code(recipient_group)
+    if recipient == UNKNOWN_GROUP:
+        return np.zeros(len(codes), dtype=bool)
+    return (codes & ~np.uint8(recipient)) == 0
+
+
+def compatible_recipient_codes(codes: np.ndarray, donor_group: str) -> np.ndarray:
+    """Boolean mask over an array of group codes: which donor_group can donate to"""
+    donor = blood_group_code(donor_group)
+    if donor == UNKNOWN_GROUP:
+        return np.zeros(len(codes), dtype=bool)
+    return ((np.uint8(donor) & ~codes) == 0) & (codes != UNKNOWN_GROUP)
+
+
+# Blood compatibility for emergency situations (recipient -> donor groups)
+BLOOD_COMPATIBILITY = {group: compatible_donor_groups(group) for group in BLOOD_GROUP_MAPPING}
 
 # Reverse compatibility (who can donate to whom)
-CAN_DONATE_TO = {
-    "O-": ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"],  # Universal donor
-    "O+": ["O+", "A+", "B+", "AB+"],
-    "A-": ["A-", "A+", "AB-", "AB+"],
-    "A+": ["A+", "AB+"],
-    "B-": ["B-", "B+", "AB-", "AB+"],
-    "B+": ["B+", "AB+"],
-    "AB-": ["AB-", "AB+"],
-    "AB+": ["AB+"]  # Universal recipient - can only donate to AB+
-}
\ No newline at end of file
+CAN_DONATE_TO = {group: compatible_recipient_groups(group) for group in _RECIPIENT_LIST_ORDER}
+
+
+# Extended red cell antigens beyond ABO/RhD, one bit each. A profile is a
+# pair of masks: the antigens that were typed, and those found positive.
+EXTENDED_ANTIGENS = ["C", "c", "E", "e", "K", "k", "Fya", "Fyb", "Jka", "Jkb", "M", "N", "S", "s"]
+ANTIGEN_BITS = {name: 1 << bit for bit, name in enumerate(EXTENDED_ANTIGENS)}
+ALL_ANTIGENS = (1 << len(EXTENDED_ANTIGENS)) - 1
+
+# Rh C/c/E/e and Kell: matched up front for chronically transfused (thalassemia)
+# patients to prevent new alloantibodies, not only when an antibody is present
+PROPHYLACTIC_ANTIGENS = sum(ANTIGEN_BITS[name] for name in ["C", "c", "E", "e", "K"])
+
+# Bits set per mask value, for counting antigen mismatches over arrays
+ANTIGEN_POPCOUNT = np.array([bin(mask).count("1") for mask in range(ALL_ANTIGENS + 1)], dtype=np.uint8)
+
+# The "anti-" prefix is case-insensitive; antigen names are not (C and c are different antigens)
+_ANTIGEN_TOKEN = re.compile(r"(?i:anti-?)?(Fy[ab]|Jk[ab]|[CcEeKkMNSs])\s*([+-]?)")
+_SEPARATORS = re.compile(r"[\s,;/]+")
+
+
+def _antigen_tokens(text: str) -> List[Tuple[str, str]]:
+    tokens = _ANTIGEN_TOKEN.findall(text)
+    if _SEPARATORS.sub("", _ANTIGEN_TOKEN.sub("", text)):
+        raise ValueError(f"Unrecognized antigen notation: {text!r}")
+    return tokens
+
+
+def parse_antigen_profile(text: Optional[str]) -> Tuple[int, int]:
+    """'C+ c- E- e+ K-' -> (typed mask, positive mask); every antigen needs a + or -"""
+    typed = positive = 0
+    for name, sign in _antigen_tokens(text or ""):
+        if not sign:
+            raise ValueError(f"Antigen {name} needs + or - in a profile")
+        typed |= ANTIGEN_BITS[name]
+        if sign == "+":
+            positive |= ANTIGEN_BITS[name]
+    return typed, positive
+
+
+def parse_antibodies(text: Optional[str]) -> int:
+    """'anti-K, anti-E' or 'K,E' -> mask of the antigens the antibodies target"""
+    mask = 0
+    for name, sign in _antigen_tokens(text or ""):
+        if sign:
+            raise ValueError(f"Antibody {name} takes no + or -")
+        mask |= ANTIGEN_BITS[name]
+    return mask
+
+
+def antigen_names(mask: int) -> List[str]:
+    return [name for name in EXTENDED_ANTIGENS if mask & ANTIGEN_BITS[name]]
+
+
+def format_antigen_profile(typed: int, positive: int) -> Optional[str]:
+    if not typed:
+        return None
+    return " ".join(f"{name}{'+' if positive & ANTIGEN_BITS[name] else '-'}" for name in antigen_names(typed))
+
+
+def antigen_safe(typed: np.ndarray, positive: np.ndarray, antibodies: int) -> np.ndarray:
+    """Donors typed negative for every antigen the patient has antibodies against"""
+    return (np.uint16(antibodies) & (positive | ~typed)) == 0
+
+
+def antigen_exposure(typed: np.ndarray, positive: np.ndarray, patient_typed: int, patient_positive: int) -> np.ndarray:
+    """Prophylactic antigens the patient lacks that each donor carries or was not typed for"""
+    patient_negative = np.uint16(patient_typed & ~patient_positive & PROPHYLACTIC_ANTIGENS)
+    return (positive | ~typed) & patient_negative
@@ -0,0 +1,169 @@
+"""Per-host circuit breakers with latency-adaptive timeouts"""
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from decouple import config
+
+BREAKER_FAILURE_THRESHOLD = config("BREAKER_FAILURE_THRESHOLD", default=5, cast=int)
+BREAKER_RESET_TIMEOUT = config("BREAKER_RESET_TIMEOUT", default=30, cast=float)
+BREAKER_HALF_OPEN_PROBES = config("BREAKER_HALF_OPEN_PROBES", default=1, cast=int)
+BREAKER_SLOW_CALL_SECONDS = config("BREAKER_SLOW_CALL_SECONDS", default=8, cast=float)
+ADAPTIVE_TIMEOUT_MIN = config("ADAPTIVE_TIMEOUT_MIN", default=2, cast=float)
+ADAPTIVE_TIMEOUT_MAX = config("ADAPTIVE_TIMEOUT_MAX", default=10, cast=float)
+ADAPTIVE_TIMEOUT_P95_MULTIPLIER = config("ADAPTIVE_TIMEOUT_P95_MULTIPLIER", default=2, cast=float)
+
+LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 10
+
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Breaker for one upstream host.
+
+    Opens after ``failure_threshold`` consecutive failures, where a call
+    slower than ``slow_call_seconds`` also counts as a failure. After
+    ``reset_timeout`` seconds it lets ``half_open_probes`` calls through;
+    a success closes it again and a failure re-opens it. The request
+    timeout tracks the p95 of recent successful calls.
+    """
+
+    def __init__(self, host: str,
+                 failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT,
+                 half_open_probes: int = BREAKER_HALF_OPEN_PROBES,
+                 slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.slow_call_seconds = slow_call_seconds
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.short_circuited = 0
+        self._probes_in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def _reset_elapsed(self) -> bool:
+        return self.opened_at is not None and time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def is_open(self) -> bool:
+        """True while calls would be short-circuited (does not consume a probe)"""
+        with self._lock:
+            if self.state == BreakerState.OPEN:
+                return not self._reset_elapsed()
+            if self.state == BreakerState.HALF_OPEN:
+                return self._probes_in_flight >= self.half_open_probes
+            return False
+
+    def allow(self) -> bool:
+        """Reserve permission for one call"""
+        with self._lock:
+            if self.state == BreakerState.OPEN and self._reset_elapsed():
+                self.state = BreakerState.HALF_OPEN
+                self._probes_in_flight = 0
+            if self.state == BreakerState.CLOSED:
+                return True
+            if self.state == BreakerState.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self, latency: float):
+        if latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._latencies.append(latency)
+            self.consecutive_failures = 0
+            if self.state == BreakerState.HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+            self.state = BreakerState.CLOSED
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == BreakerState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != BreakerState.OPEN:
+                    self.times_opened += 1
+                self.state = BreakerState.OPEN
+                self.opened_at = time.monotonic()
+                self._probes_in_flight = 0
+
+    def record_cancelled(self):
+        """Release a half-open probe slot for a call that was abandoned"""
+        with self._lock:
+            if self.state == BreakerState.HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def p95_latency(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    def timeout(self) -> float:
+        """Request timeout adapted from observed p95 latency"""
+        p95 = self.p95_latency()
+        if p95 is None:
+            return ADAPTIVE_TIMEOUT_MAX
+        return min(max(p95 * ADAPTIVE_TIMEOUT_P95_MULTIPLIER, ADAPTIVE_TIMEOUT_MIN), ADAPTIVE_TIMEOUT_MAX)
+
+    def snapshot(self) -> Dict:
+        p95 = self.p95_latency()
+        timeout = self.timeout()
+        with self._lock:
+            state = self.state
+            if state == BreakerState.OPEN and self._reset_elapsed():
+                state = BreakerState.HALF_OPEN
+            return {
+                "state": state.value,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "short_circuited_calls": self.short_circuited,
+                "p95_latency_seconds": round(p95, 3) if p95 is not None else None,
+                "timeout_seconds": round(timeout, 3),
+                "latency_samples": len(self._latencies)
+            }
+
+
+class BreakerRegistry:
+    """One CircuitBreaker per upstream host"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host)
+            return breaker
+
+    def is_open(self, url: Optional[str]) -> bool:
+        return bool(url) and self.for_url(url).is_open()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.snapshot() for host, breaker in breakers.items()}
@@ -0,0 +1,128 @@
+"""In-memory multi-key index over registered donors.
+
+Three postings structures are kept per donor key:
+
+- blood group -> keys
+- (normalized location part, blood group) -> keys, for searches that name
+  a location; every comma-separated part of a donor's location (locality,
+  city, state) is indexed, and a search term selects every part it
+  prefixes word-wise ("chen" -> "chennai", "mumbai" -> "navi mumbai")
+- eligibility: the set of available donors, plus a list of
+  (eligible date ordinal, key) for the rest, sorted so that "eligible
+  within N days" is a bisect instead of a date parse per donor
+
+A query unions the postings for its (location, group) cells and
+intersects them with the eligibility sets, so it touches only donors that
+could match.
+"""
+import threading
+from bisect import bisect_right, insort
+from collections import defaultdict
+from itertools import product
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from .location_index import LocationVocabulary, location_terms
+
+
+class DonorIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._donors: Dict[int, Dict] = {}
+        self._groups: Dict[str, Set[int]] = defaultdict(set)
+        self._cells: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        self._vocabulary = LocationVocabulary()
+        self._available: Set[int] = set()
+        # (eligible_next ordinal, key) for donors who are not currently available
+        self._waiting: List[Tuple[int, int]] = []
+        self._ordinals: Dict[int, int] = {}
+        self.last_key = 0
+
+    def __len__(self) -> int:
+        return len(self._donors)
+
+    def add(self, key: int, donor: Dict):
+        """Index a donor record under its repository key; re-adding a key replaces it"""
+        with self._lock:
+            if key in self._donors:
+                self._remove(key)
+            self._donors[key] = donor
+            group = donor["blood_group"]
+            self._groups[group].add(key)
+            for term in set(location_terms(donor["location"])):
+                self._cells[(term, group)].add(key)
+                self._vocabulary.add(term)
+
+            ordinal = date.fromisoformat(donor["eligible_next"]).toordinal()
+            self._ordinals[key] = ordinal
+            if donor["status"] == "available":
+                self._available.add(key)
+            else:
+                insort(self._waiting, (ordinal, key))
+            self.last_key = max(self.last_key, key)
+
+    def remove(self, key: int):
+        with self._lock:
+            if key in self._donors:
+                self._remove(key)
+
+    def _remove(self, key: int):
+        donor = self._donors.pop(key)
+        group = donor["blood_group"]
+        self._groups[group].discard(key)
+        for term in set(location_terms(donor["location"])):
+            if (term, group) in self._cells:
+                self._cells[(term, group)].discard(key)
+
+        ordinal = self._ordinals.pop(key)
+        if key in self._available:
+            self._available.discard(key)
+        else:
+            position = bisect_right(self._waiting, (ordinal, key)) - 1
+            if position >= 0 and self._waiting[position] == (ordinal, key):
+                del self._waiting[position]
+
+    def candidates(self, blood_groups: List[str], location: str, urgency: str,
+                   eligible_by: date) -> Set[int]:
+        """Keys of donors of the given groups near location who are reachable for this urgency.
+
+        normal: available donors only; urgent: also donors eligible by
+        ``eligible_by``; emergency: every donor.
+        """
+        with self._lock:
+            terms = location_terms(location) if location else []
+            if terms:
+                terms = self._vocabulary.expand(terms)
+                postings = [self._cells[cell] for cell in product(terms, blood_groups) if cell in self._cells]
+            else:
+                postings = [self._groups[group] for group in blood_groups if group in self._groups]
+            keys = set().union(*postings)
+
+            if urgency == "emergency":
+                pass
+            elif urgency == "urgent":
+                keys = (keys & self._available) | self._eligible_by(keys - self._available, eligible_by)
+            else:
+                keys &= self._available
+
+            return keys
+
+    def _eligible_by(self, waiting: Set[int], eligible_by: date) -> Set[int]:
+        """Keys in ``waiting`` whose eligibility date is on or before ``eligible_by``"""
+        ordinal = eligible_by.toordinal()
+        cutoff = bisect_right(self._waiting, (ordinal, float("inf")))
+        if cutoff < len(waiting):
+            return {key for _, key in self._waiting[:cutoff] if key in waiting}
+        return {key for key in waiting if self._ordinals[key] <= ordinal}
+
+    def estimate(self, blood_groups: List[str], location: str) -> int:
+        """Upper bound on the candidates a search can return, from postings sizes alone"""
+        terms = location_terms(location) if location else []
+        with self._lock:
+            if terms:
+                terms = self._vocabulary.expand(terms)
+                return sum(len(self._cells[cell]) for cell in product(terms, blood_groups) if cell in self._cells)
+            return sum(len(self._groups[group]) for group in blood_groups if group in self._groups)
+
+    def get(self, key: int) -> Optional[Dict]:
+        return self._donors.get(key)
@@ -0,0 +1,113 @@
+"""Incrementally maintained donor statistics.
+
+Counters (total, available, verified) per blood group are kept for the
+whole registry, for every normalized location part (locality, city,
+state) and for every distinct place, the tuple of a location's parts.
+Registering or updating a donor adjusts a handful of counters, and a
+statistics query reads them back in O(blood groups) for a single location
+term. Search terms match location parts by word prefix, like
+DonorIndex. A query matching several parts (``"Chennai, Tamil Nadu"``, or
+``"chen"`` matching two cities) sums the distinct places those parts
+cover, so donors matching both the city and the state are counted once.
+Places and parts are dropped once their last donor leaves.
+"""
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+from .location_index import LocationVocabulary, location_terms
+
+TOTAL, AVAILABLE, VERIFIED = 0, 1, 2
+
+
+class _Scope:
+    """Per-blood-group counters and location strings for one slice of the registry"""
+
+    def __init__(self):
+        self.groups: Dict[str, list] = defaultdict(lambda: [0, 0, 0])
+        self.areas = Counter()
+
+    def __bool__(self) -> bool:
+        return bool(self.groups)
+
+    def apply(self, donor: Dict, sign: int):
+        counts = self.groups[donor["blood_group"]]
+        counts[TOTAL] += sign
+        counts[AVAILABLE] += sign * (donor["status"] == "available")
+        counts[VERIFIED] += sign * bool(donor.get("verified"))
+        if counts[TOTAL] == 0:
+            del self.groups[donor["blood_group"]]
+        self.areas[donor["location"]] += sign
+        if self.areas[donor["location"]] <= 0:
+            del self.areas[donor["location"]]
+
+
+class DonorStatistics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._all = _Scope()
+        self._terms: Dict[str, _Scope] = defaultdict(_Scope)
+        self._places: Dict[Tuple[str, ...], _Scope] = defaultdict(_Scope)
+        self._term_places: Dict[str, Set[Tuple[str, ...]]] = defaultdict(set)
+        self._vocabulary = LocationVocabulary()
+
+    def _apply(self, donor: Dict, sign: int):
+        place = tuple(location_terms(donor["location"]))
+        self._all.apply(donor, sign)
+        self._places[place].apply(donor, sign)
+        emptied = not self._places[place]
+        if emptied:
+            del self._places[place]
+        for term in set(place):
+            self._terms[term].apply(donor, sign)
+            if emptied:
+                self._term_places[term].discard(place)
+            else:
+                self._term_places[term].add(place)
+                self._vocabulary.add(term)
+            if not self._terms[term]:
+                del self._terms[term]
+                del self._term_places[term]
+
+    def add(self, donor: Dict):
+        with self._lock:
+            self._apply(donor, 1)
+
+    def replace(self, old: Optional[Dict], new: Dict):
+        """Move a donor's contribution from its previous record to its current one"""
+        with self._lock:
+            if old is not None:
+                self._apply(old, -1)
+            self._apply(new, 1)
+
+    def snapshot(self, location: Optional[str] = None) -> Dict:
+        """Totals, available/verified counts, per-group distribution and coverage areas"""
+        with self._lock:
+            terms = location_terms(location) if location else []
+            if not terms:
+                scopes = [self._all]
+            else:
+                terms = [term for term in self._vocabulary.expand(terms) if term in self._terms]
+                if len(terms) == 1:
+                    scopes = [self._terms[terms[0]]]
+                else:
+                    places = set().union(*(self._term_places[term] for term in terms))
+                    scopes = [self._places[place] for place in places]
+
+            distribution = Counter()
+            available = verified = 0
+            areas = set()
+            for scope in scopes:
+                for group, counts in scope.groups.items():
+                    distribution[group] += counts[TOTAL]
+                    available += counts[AVAILABLE]
+                    verified += counts[VERIFIED]
+                areas.update(scope.areas)
+
+        return {
+            "total_donors": sum(distribution.values()),
+            "available_donors": available,
+            "verified_donors": verified,
+            "blood_group_distribution": dict(distribution),
+            "coverage_areas": sorted(areas)
+        }
@@ -0,0 +1,248 @@
+"""Columnar (struct-of-arrays) donor table for vectorized ranking.
+
+Each donor is one row across parallel NumPy columns: repository key,
+blood group code, location, city and state ids, eligibility date ordinal,
+availability, donation count and extended antigen bitsets. Rows are appended in key order, so a
+batch of keys maps to rows with one ``searchsorted``. A location id stands
+for the tuple of every comma-separated part of a donor's location, so a
+search term can match a locality or city in the middle ("Anna Nagar,
+Chennai, Tamil Nadu") as well as the first and last parts, by word prefix
+like DonorIndex.
+
+``match`` filters every row with column masks, which beats set postings
+once a search covers a large share of donors (a whole state). ``rank``
+scores candidate rows (100 for the requested blood group, 50 for a
+compatible one, +30 same city, +20 same state) into a Ranking whose pages
+are top-k selections, without building a dict per candidate;
+``rank_phenotype`` selects the top k
+after screening out donors who carry antigens the patient has antibodies
+against.
+"""
+import threading
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .blood_mappings import (
+    ANTIGEN_POPCOUNT, EXTENDED_ANTIGENS, UNKNOWN_GROUP, antigen_exposure, antigen_safe, blood_group_code,
+    compatible_donor_codes, parse_antigen_profile
+)
+from .location_index import LocationVocabulary, location_keys, location_terms
+
+EXACT_GROUP_SCORE = 100
+COMPATIBLE_GROUP_SCORE = 50
+CITY_SCORE = 30
+STATE_SCORE = 20
+
+INITIAL_CAPACITY = 1024
+
+_COLUMNS = {
+    "key": np.int64,
+    "group": np.uint8,
+    "location": np.int32,
+    "city": np.int32,
+    "state": np.int32,
+    "eligible": np.int32,
+    "available": np.bool_,
+    "donation_count": np.int32,
+    "antigen_typed": np.uint16,
+    "antigen_positive": np.uint16
+}
+
+
+def top_k(order_by: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """Positions of the k largest values, descending; ties in position order.
+
+    argpartition-style selection: O(n) to find the k-th value, then only
+    the k winners are sorted.
+    """
+    total = len(order_by)
+    if k is not None and k < total:
+        kth = np.partition(order_by, total - k)[total - k]
+        above = np.flatnonzero(order_by > kth)
+        tied = np.flatnonzero(order_by == kth)[:k - len(above)]
+        selected = np.concatenate([above, tied])
+    else:
+        selected = np.arange(total)
+    return selected[np.lexsort((selected, -order_by[selected]))]
+
+
+class Ranking:
+    """Scored candidates of one search, ordered by (score, donation count) desc, then key asc.
+
+    A position in that order is (score, donation count, key), which is
+    what keyset cursors carry: ``page`` returns the next k entries strictly
+    after a position without sorting the rest of the candidates.
+    """
+
+    def __init__(self, keys: np.ndarray, scores: np.ndarray, donation_counts: np.ndarray):
+        self.keys = keys
+        self.scores = scores
+        self.donation_counts = donation_counts
+        self._order_by = (scores << 32) | donation_counts
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def page(self, k: Optional[int], after: Optional[Tuple[int, int, int]] = None) -> Tuple[np.ndarray, int]:
+        """(positions of the next k entries after ``after``, number of entries after ``after``)"""
+        if after is None:
+            remaining = np.arange(len(self.keys))
+        else:
+            score, donation_count, key = after
+            order = (score << 32) | donation_count
+            remaining = np.flatnonzero((self._order_by < order) | ((self._order_by == order) & (self.keys > key)))
+        return remaining[top_k(self._order_by[remaining], k)], len(remaining)
+
+    def position(self, index: int) -> Tuple[int, int, int]:
+        return int(self.scores[index]), int(self.donation_counts[index]), int(self.keys[index])
+
+
+class DonorTable:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self._lock = threading.Lock()
+        self._size = 0
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in _COLUMNS.items()}
+        # City and state names share one vocabulary; id 0 is "no name"
+        self._place_ids: Dict[str, int] = {"": 0}
+        # Location part tuples, and the location ids containing each part
+        self._location_ids: Dict[Tuple[str, ...], int] = {}
+        self._term_locations: Dict[str, List[int]] = defaultdict(list)
+        self._vocabulary = LocationVocabulary()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _place_id(self, name: str) -> int:
+        return self._place_ids.setdefault(name, len(self._place_ids))
+
+    def _location_id(self, terms: Tuple[str, ...]) -> int:
+        location_id = self._location_ids.get(terms)
+        if location_id is None:
+            location_id = self._location_ids[terms] = len(self._location_ids)
+            for term in set(terms):
+                self._term_locations[term].append(location_id)
+                self._vocabulary.add(term)
+        return location_id
+
+    def _grow(self, needed: int):
+        capacity = len(self._columns["key"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def upsert(self, key: int, donor: Dict):
+        """Write a donor's row; new keys must arrive in increasing order"""
+        city, state = location_keys(donor["location"])
+        antigen_typed, antigen_positive = parse_antigen_profile(donor.get("antigen_profile"))
+        values = {
+            "key": key,
+            "group": blood_group_code(donor["blood_group"]),
+            "city": self._place_id(city),
+            "state": self._place_id(state),
+            "eligible": date.fromisoformat(donor["eligible_next"]).toordinal(),
+            "available": donor["status"] == "available",
+            "donation_count": donor.get("donation_count") or 0,
+            "antigen_typed": antigen_typed,
+            "antigen_positive": antigen_positive
+        }
+        with self._lock:
+            values["location"] = self._location_id(tuple(location_terms(donor["location"])))
+            keys = self._columns["key"][:self._size]
+            row = int(np.searchsorted(keys, key))
+            if row == self._size:
+                self._grow(self._size + 1)
+                self._size += 1
+            elif keys[row] != key:
+                raise ValueError(f"Donor key {key} arrived out of order")
+            for name, value in values.items():
+                self._columns[name][row] = value
+
+    def _snapshot(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            return {name: column[:self._size] for name, column in self._columns.items()}
+
+    def match(self, blood_group: str, location: str, urgency: str, eligible_by: date) -> np.ndarray:
+        """Rows of donors compatible with blood_group near location who are reachable for this urgency.
+
+        Same filters as DonorIndex.candidates, evaluated over whole columns.
+        """
+        columns = self._snapshot()
+        mask = compatible_donor_codes(columns["group"], blood_group)
+
+        terms = location_terms(location) if location else []
+        if terms:
+            with self._lock:
+                wanted = np.zeros(len(self._location_ids), dtype=bool)
+                for term in self._vocabulary.expand(terms):
+                    wanted[self._term_locations[term]] = True
+            mask &= wanted[columns["location"]]
+
+        if urgency == "urgent":
+            mask &= columns["available"] | (columns["eligible"] <= eligible_by.toordinal())
+        elif urgency != "emergency":
+            mask &= columns["available"]
+        return np.flatnonzero(mask)
+
+    def rows_for(self, keys: Iterable[int]) -> np.ndarray:
+        """Sorted rows of the given keys"""
+        columns = self._snapshot()
+        return np.sort(np.searchsorted(columns["key"], np.fromiter(keys, dtype=np.int64)))
+
+    def _scores(self, columns: Dict[str, np.ndarray], rows: np.ndarray, blood_group: str, location: str) -> np.ndarray:
+        requested_city, requested_state = location_keys(location)
+        city_id = self._place_ids.get(requested_city, -1)
+        state_id = self._place_ids.get(requested_state, -1) if requested_state else -1
+
+        # Score per group code: exact match, compatible donor, or neither
+        codes = np.arange(UNKNOWN_GROUP + 1, dtype=np.uint8)
+        group_scores = np.where(compatible_donor_codes(codes, blood_group), COMPATIBLE_GROUP_SCORE, 0)
+        group_scores[codes == blood_group_code(blood_group)] = EXACT_GROUP_SCORE
+        group_scores[UNKNOWN_GROUP] = 0
+
+        scores = group_scores[columns["group"][rows]]
+        scores += CITY_SCORE * (columns["city"][rows] == city_id)
+        scores += STATE_SCORE * (columns["state"][rows] == state_id)
+        return scores
+
+    def rank(self, rows: np.ndarray, blood_group: str, location: str) -> "Ranking":
+        """Score ``rows`` (sorted) for a search; pages are then cut with Ranking.page"""
+        columns = self._snapshot()
+        scores = self._scores(columns, rows, blood_group, location)
+        return Ranking(columns["key"][rows], scores, columns["donation_count"][rows].astype(np.int64))
+
+    def rank_phenotype(self, rows: np.ndarray, blood_group: str, location: str, antibodies: int,
+                       patient_typed: int, patient_positive: int,
+                       k: Optional[int] = None) -> Tuple[List[int], List[int], List[int], int]:
+        """Antigen-matched top ``k`` of ``rows`` for a chronically transfused patient.
+
+        Donors not typed negative for every antigen in ``antibodies`` are
+        dropped. The rest rank by fewest prophylactic antigen exposures,
+        then compatibility score and donation count. Returns (keys,
+        scores, exposure masks, number of antigen-safe rows).
+        """
+        columns = self._snapshot()
+        typed, positive = columns["antigen_typed"][rows], columns["antigen_positive"][rows]
+        safe = antigen_safe(typed, positive, antibodies)
+        rows, typed, positive = rows[safe], typed[safe], positive[safe]
+
+        exposure = antigen_exposure(typed, positive, patient_typed, patient_positive)
+        scores = self._scores(columns, rows, blood_group, location)
+        # Fewest exposures first, then score, then donation count
+        exposures = ANTIGEN_POPCOUNT[exposure].astype(np.int64)
+        order_by = (
+            ((len(EXTENDED_ANTIGENS) - exposures) << 48) | (scores << 32)
+            | columns["donation_count"][rows].astype(np.int64)
+        )
+        selected = top_k(order_by, k)
+        return (
+            columns["key"][rows[selected]].tolist(), scores[selected].tolist(),
+            exposure[selected].tolist(), len(rows)
+        )
@@ -294,4 +294,31 @@ EMERGENCY_CONTACTS = {
     "Kerala": {
         "State Blood Bank": "0471-2552056"
     }
-}
\ No newline at end of file
+}
+
+# Alternate spellings and abbreviations for fallback locations
+LOCATION_ALIASES = {
+    "states": {
+        "Tamil Nadu": ["Tamilnadu", "TN", "Tamil Naadu"],
+        "Karnataka": ["KA", "Karnatak"],
+        "Kerala": ["KL", "Keralam"],
+        "Andhra Pradesh": ["AP", "Andhra", "Telangana", "TS"],
+        "Maharashtra": ["MH", "Maharastra"],
+        "Delhi": ["DL", "NCT of Delhi", "New Delhi"]
+    },
+    "districts": {
+        "Chennai": ["Madras"],
+        "Coimbatore": ["Kovai"],
+        "Trichy": ["Tiruchirappalli", "Tiruchirapalli", "Tiruchchirappalli"],
+        "Bangalore": ["Bengaluru", "Bangaluru", "Bangalore Urban"],
+        "Mysore": ["Mysuru"],
+        "Kochi": ["Cochin", "Ernakulam"],
+        "Thiruvananthapuram": ["Trivandrum"],
+        "Calicut": ["Kozhikode"],
+        "Hyderabad": ["Secunderabad"],
+        "Visakhapatnam": ["Vizag", "Vishakhapatnam"],
+        "Mumbai": ["Bombay", "Mumbai City", "Mumbai Suburban"],
+        "Pune": ["Poona"],
+        "New Delhi": ["Delhi"]
+    }
+}
@@ -0,0 +1,132 @@
+"""Discovered eRaktKosh search form schema and its cache"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+STATE = "state"
+DISTRICT = "district"
+BLOOD_GROUP = "blood_group"
+COMPONENT = "component"
+
+
+def infer_field_role(name: str) -> Optional[str]:
+    """Map a form field name to the lookup value it should carry"""
+    name_lower = name.lower()
+    if any(keyword in name_lower for keyword in ['state', 'stat']):
+        return STATE
+    if any(keyword in name_lower for keyword in ['district', 'dist']):
+        return DISTRICT
+    if any(keyword in name_lower for keyword in ['blood', 'group']):
+        return BLOOD_GROUP
+    if any(keyword in name_lower for keyword in ['component', 'type']):
+        return COMPONENT
+    return None
+
+
+@dataclass
+class FormSchema:
+    url: str
+    method: str
+    field_roles: Dict[str, str]
+    hidden_fields: Dict[str, str]
+    # (option value, lowercased option text) pairs of the state <select>, if any
+    state_options: Optional[List[Tuple[str, str]]] = None
+    discovered_at: float = field(default_factory=time.monotonic)
+
+    def state_code(self, state: str) -> str:
+        """Find state code from the discovered select options"""
+        if self.state_options is None:
+            return state
+
+        state_lower = state.lower()
+        for value, text in self.state_options:
+            if state_lower in text or text in state_lower:
+                return value if value else text
+
+        return state
+
+    def build_form_data(self, state: str, district: str, blood_group: str, component: str) -> Dict[str, str]:
+        """Fill the form for a lookup; blood group and component must already be normalized"""
+        values = {
+            STATE: self.state_code(state),
+            DISTRICT: district,
+            BLOOD_GROUP: blood_group,
+            COMPONENT: component
+        }
+        form_data = dict(self.hidden_fields)
+        for name, role in self.field_roles.items():
+            form_data[name] = values[role]
+        return form_data
+
+
+def extract_form_schema(form, page_url: str) -> Optional[FormSchema]:
+    """Build a FormSchema from an lxml <form> element, or None if nothing can be filled"""
+    action = form.get('action', '')
+    method = form.get('method', 'get').lower()
+
+    field_roles = {}
+    hidden_fields = {}
+    state_options = None
+    for input_elem in form.iter('input', 'select'):
+        name = input_elem.get('name')
+        if not name:
+            continue
+
+        role = infer_field_role(name)
+        if role:
+            field_roles[name] = role
+            if role == STATE and input_elem.tag == 'select':
+                state_options = [
+                    (option.get('value', ''), option.text_content().strip().lower())
+                    for option in input_elem.iter('option')
+                ]
+        elif input_elem.get('type') == 'hidden':
+            hidden_fields[name] = input_elem.get('value', '')
+
+    if not field_roles and not hidden_fields:
+        return None
+
+    form_url = action if action.startswith('http') else page_url.split('?')[0].rsplit('/', 1)[0] + '/' + action
+    return FormSchema(
+        url=form_url,
+        method=method,
+        field_roles=field_roles,
+        hidden_fields=hidden_fields,
+        state_options=state_options
+    )
+
+
+class FormSchemaCache:
+    """Working form schema per portal base URL, expiring after ``ttl`` seconds"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._schemas: Dict[str, FormSchema] = {}
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def get(self, base_url: str) -> Optional[FormSchema]:
+        with self._lock:
+            schema = self._schemas.get(base_url)
+            if schema and time.monotonic() - schema.discovered_at > self.ttl:
+                del self._schemas[base_url]
+                return None
+            return schema
+
+    def set(self, base_url: str, schema: FormSchema):
+        with self._lock:
+            self._schemas[base_url] = schema
+
+    def invalidate(self, base_url: str):
+        with self._lock:
+            if self._schemas.pop(base_url, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "cached_portals": list(self._schemas.keys()),
+                "ttl_seconds": self.ttl,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,127 @@
+"""lxml-backed extraction helpers for eRaktKosh pages.
+
+Only the parts of a page the scraper uses are walked: tables for results,
+forms for submission, links for crawling and selects/scripts for the
+connectivity diagnostics. XPath runs over libxml2's C tree, which is much
+faster and lighter than building a BeautifulSoup tree with html.parser.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+
+RESULT_TABLE_KEYWORDS = ['blood', 'bank', 'hospital', 'availability']
+AJAX_PATTERNS = ['$.ajax', '$.get', '$.post', 'XMLHttpRequest', 'fetch(']
+
+
+def parse_document(html: str) -> Optional[lxml.html.HtmlElement]:
+    """Parse HTML into an lxml tree, or None for empty/unparseable input"""
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.fromstring(html)
+    except ValueError:
+        # Unicode strings with an XML encoding declaration must be parsed as bytes
+        try:
+            return lxml.html.fromstring(html.encode('utf-8'))
+        except etree.ParserError:
+            return None
+    except etree.ParserError:
+        return None
+
+
+def element_text(element) -> str:
+    """Whitespace-normalized text, keeping a space where <br/> and child tags split words"""
+    return " ".join(" ".join(element.itertext()).split())
+
+
+def parse_results(html: str) -> Optional[List[Dict[str, str]]]:
+    """Rows of every table whose header row looks like blood bank data.
+
+    None when the page has no such table (an error or session-expired
+    page); an empty list when result tables are present but have no rows.
+    """
+    doc = parse_document(html)
+    if doc is None:
+        return None
+
+    blood_banks = None
+    for table in doc.iter('table'):
+        rows = table.xpath('.//tr')
+        if not rows:
+            continue
+
+        headers = [element_text(cell).lower() for cell in rows[0].xpath('./th|./td')]
+        header_text = ' '.join(headers)
+        if not any(keyword in header_text for keyword in RESULT_TABLE_KEYWORDS):
+            continue
+
+        if blood_banks is None:
+            blood_banks = []
+        for row in rows[1:]:
+            cells = [element_text(td) for td in row.xpath('./td')]
+            if len(cells) < 2:
+                continue
+
+            bank_data = dict(zip(headers, cells))
+            if bank_data:
+                blood_banks.append(bank_data)
+
+    return blood_banks
+
+
+def parse_result_tables(html: str) -> List[Dict[str, str]]:
+    """Rows of every table whose header row looks like blood bank data"""
+    return parse_results(html) or []
+
+
+def extract_links(html: str) -> List[Tuple[str, str]]:
+    """(href, lowercased link text) for every anchor with an href"""
+    doc = parse_document(html)
+    if doc is None:
+        return []
+    return [(a.get('href', ''), element_text(a).lower()) for a in doc.xpath('//a[@href]')]
+
+
+def find_forms(html: str) -> List[lxml.html.FormElement]:
+    doc = parse_document(html)
+    if doc is None:
+        return []
+    return list(doc.iter('form'))
+
+
+def analyze_page_structure(html: str) -> Dict:
+    """Counts of forms and inputs, state/district dropdowns and AJAX usage"""
+    doc = parse_document(html)
+    analysis = {
+        "forms": 0,
+        "select_elements": 0,
+        "input_elements": 0,
+        "potential_state_dropdown": False,
+        "potential_district_dropdown": False,
+        "ajax_calls": []
+    }
+    if doc is None:
+        return analysis
+
+    selects = doc.xpath('//select')
+    analysis["forms"] = int(doc.xpath('count(//form)'))
+    analysis["select_elements"] = len(selects)
+    analysis["input_elements"] = int(doc.xpath('count(//input)'))
+
+    for select in selects:
+        select_id = select.get('id', '').lower()
+        select_name = select.get('name', '').lower()
+        if any(keyword in select_id or keyword in select_name
+               for keyword in ['state', 'stat']):
+            analysis["potential_state_dropdown"] = True
+        if any(keyword in select_id or keyword in select_name
+               for keyword in ['district', 'dist']):
+            analysis["potential_district_dropdown"] = True
+
+    for script in doc.xpath('//script[not(@src)]/text()'):
+        for pattern in AJAX_PATTERNS:
+            if pattern in script:
+                analysis["ajax_calls"].append(pattern)
+
+    return analysis
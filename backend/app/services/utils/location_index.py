@@ -0,0 +1,242 @@
+"""Prebuilt fuzzy location index over the fallback blood bank directory"""
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .normalization import COMPONENT_COMPATIBILITY, KNOWN_COMPONENT_NAMES, component_matches, normalize_component
+from .pin_gazetteer import extract_pin, resolve_pin
+from .spatial_index import GeoKDTree
+
+MIN_MATCH_SCORE = 0.5
+
+# Words shared by many Indian state and district names ("Uttar Pradesh", "Anna Nagar"). They
+# weigh little in token matching and are left out of trigram matching, so a query must match
+# the distinctive part of a name.
+GENERIC_LOCATION_TOKENS = frozenset({
+    "pradesh", "nagar", "district", "dist", "city", "town", "urban", "rural", "suburban",
+    "north", "south", "east", "west", "central", "new", "old", "of", "and", "the", "islands"
+})
+GENERIC_TOKEN_WEIGHT = 0.1
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_location(name: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return _NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+def location_keys(location: str) -> Tuple[str, str]:
+    """'Chennai, Tamil Nadu' -> ('chennai', 'tamil nadu'); a single part is treated as the city"""
+    parts = [normalize_location(part) for part in location.split(",") if part.strip()]
+    if not parts:
+        return "", ""
+    return parts[0], (parts[-1] if len(parts) > 1 else "")
+
+
+def location_terms(location: str) -> List[str]:
+    """Every normalized comma-separated part of a search location"""
+    return [term for term in (normalize_location(part) for part in location.split(",")) if term]
+
+
+class LocationVocabulary:
+    """Donor location terms, searchable by a prefix of any of their words.
+
+    "navi mumbai" is found by "navi", "navi mum", "mumbai" and "mum", so a
+    search term matches what the free-text substring test it replaced
+    matched, except for fragments starting mid-word.
+    """
+
+    def __init__(self):
+        self._terms: Set[str] = set()
+        # (word suffix of a term, term), sorted for prefix bisects
+        self._keys: List[Tuple[str, str]] = []
+
+    def add(self, term: str):
+        if term in self._terms:
+            return
+        self._terms.add(term)
+        words = term.split()
+        for i in range(len(words)):
+            insort(self._keys, (" ".join(words[i:]), term))
+
+    def expand(self, prefixes: Iterable[str]) -> Set[str]:
+        """Known terms matching any of the search terms by word prefix"""
+        terms = set()
+        for prefix in prefixes:
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and self._keys[position][0].startswith(prefix):
+                terms.add(self._keys[position][1])
+                position += 1
+        return terms
+
+
+def _trigrams(name: str) -> FrozenSet[str]:
+    padded = f"  {name} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _distinctive(normalized: str) -> str:
+    """A normalized name without its generic tokens; the whole name if every token is generic"""
+    tokens = [token for token in normalized.split() if token not in GENERIC_LOCATION_TOKENS]
+    return " ".join(tokens) or normalized
+
+
+class NameIndex:
+    """Exact, token and trigram postings over a set of canonical names and their aliases.
+
+    Token matches are weighted by inverse document frequency across the
+    indexed names, with generic tokens down-weighted further; trigrams are
+    taken from the distinctive part of each name only.
+    """
+
+    def __init__(self):
+        self._exact: Dict[str, str] = {}
+        self._tokens = defaultdict(set)
+        self._trigrams = defaultdict(set)
+        # Normalized name/alias -> (canonical, token set, distinctive trigram set)
+        self._names: Dict[str, Tuple[str, FrozenSet[str], FrozenSet[str]]] = {}
+
+    def add(self, canonical: str, aliases: List[str] = ()):
+        for name in [canonical, *aliases]:
+            normalized = normalize_location(name)
+            if not normalized:
+                continue
+            tokens = frozenset(normalized.split())
+            trigrams = _trigrams(_distinctive(normalized))
+            self._exact.setdefault(normalized, canonical)
+            self._exact.setdefault(normalized.replace(" ", ""), canonical)
+            self._names[normalized] = (canonical, tokens, trigrams)
+            for token in tokens:
+                self._tokens[token].add(normalized)
+            for trigram in trigrams:
+                self._trigrams[trigram].add(normalized)
+
+    def _token_weight(self, token: str) -> float:
+        weight = math.log((len(self._names) + 1) / (len(self._tokens.get(token, ())) + 1)) + 1
+        return weight * GENERIC_TOKEN_WEIGHT if token in GENERIC_LOCATION_TOKENS else weight
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Ranked (canonical, score) candidates; an exact name or alias scores 1.0"""
+        normalized = normalize_location(query)
+        if not normalized:
+            return []
+
+        exact = self._exact.get(normalized) or self._exact.get(normalized.replace(" ", ""))
+        if exact:
+            return [(exact, 1.0)]
+
+        query_tokens = frozenset(normalized.split())
+        query_trigrams = _trigrams(_distinctive(normalized))
+
+        shared_trigrams = Counter()
+        for trigram in query_trigrams:
+            for name in self._trigrams.get(trigram, ()):
+                shared_trigrams[name] += 1
+        token_hits = set()
+        for token in query_tokens:
+            token_hits.update(self._tokens.get(token, ()))
+
+        weights: Dict[str, float] = {}
+        scores: Dict[str, float] = {}
+        for name in token_hits | set(shared_trigrams):
+            canonical, tokens, trigrams = self._names[name]
+            for token in query_tokens | tokens:
+                if token not in weights:
+                    weights[token] = self._token_weight(token)
+            token_score = (
+                sum(weights[token] for token in query_tokens & tokens)
+                / sum(weights[token] for token in query_tokens | tokens)
+            )
+            trigram_score = 2 * shared_trigrams[name] / (len(query_trigrams) + len(trigrams))
+            score = max(token_score, trigram_score)
+            if score >= MIN_MATCH_SCORE and score > scores.get(canonical, 0.0):
+                scores[canonical] = score
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(canonical, round(score, 3)) for canonical, score in ranked[:limit]]
+
+
+def _with_coordinates(bank: Dict) -> Dict:
+    """Copy of a bank with latitude/longitude resolved from the PIN in its address"""
+    located = dict(bank)
+    pin = extract_pin(bank.get("address", ""))
+    resolved = resolve_pin(pin) if pin else None
+    if resolved:
+        located["latitude"], located["longitude"], located["coordinate_precision"] = resolved
+    return located
+
+
+class LocationIndex:
+    """State and district resolver, per-bank component name sets and a KD-tree of bank locations"""
+
+    def __init__(self, directory: Dict, aliases: Optional[Dict] = None):
+        aliases = aliases or {}
+        state_aliases = aliases.get("states", {})
+        district_aliases = aliases.get("districts", {})
+
+        self.directory = directory
+        self.states = NameIndex()
+        self.districts: Dict[str, NameIndex] = {}
+        self.banks: Dict[Tuple[str, str], List[Tuple[Dict, FrozenSet[str]]]] = {}
+        located_banks = []
+
+        for state, districts in directory.items():
+            self.states.add(state, state_aliases.get(state, []))
+            district_index = NameIndex()
+            for district, banks in districts.items():
+                district_index.add(district, district_aliases.get(district, []))
+                entries = []
+                for bank in banks:
+                    bank = _with_coordinates(bank)
+                    component_names = frozenset(component.lower() for component in bank.get("components", []))
+                    entries.append((bank, component_names))
+                    if "latitude" in bank:
+                        located_banks.append((bank["latitude"], bank["longitude"], (state, district, bank, component_names)))
+                self.banks[(state, district)] = entries
+            self.districts[state] = district_index
+
+        self.geo = GeoKDTree(located_banks)
+
+    def resolve_state(self, state: str, limit: int = 5) -> List[Tuple[str, float]]:
+        return self.states.search(state, limit)
+
+    def resolve_district(self, state_key: str, district: str, limit: int = 5) -> List[Tuple[str, float]]:
+        district_index = self.districts.get(state_key)
+        if district_index is None:
+            return []
+        return district_index.search(district, limit)
+
+    def banks_with_component(self, state_key: str, district_key: str, component: str) -> List[Dict]:
+        """Banks in a district offering a component compatible with the request"""
+        return [
+            bank for bank, component_names in self.banks.get((state_key, district_key), [])
+            if _offers_component(bank, component_names, component)
+        ]
+
+    def banks_near(self, lat: float, lon: float, radius_km: float, component: str,
+                   limit: int = 10) -> List[Tuple[float, str, str, Dict]]:
+        """(distance km, state, district, bank) within radius_km offering the component, nearest first"""
+        matches = []
+        for distance, (state, district, bank, component_names) in self.geo.within(lat, lon, radius_km):
+            if _offers_component(bank, component_names, component):
+                matches.append((distance, state, district, bank))
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def nearest_banks(self, lat: float, lon: float, k: int = 3) -> List[Tuple[float, str, str, Dict]]:
+        """The k nearest banks regardless of distance or components"""
+        return [
+            (distance, state, district, bank)
+            for distance, (state, district, bank, _) in self.geo.nearest(lat, lon, k)
+        ]
+
+
+def _offers_component(bank: Dict, component_names: FrozenSet[str], component: str) -> bool:
+    compatible = COMPONENT_COMPATIBILITY.get(normalize_component(component))
+    if compatible is not None and component_names <= KNOWN_COMPONENT_NAMES:
+        return bool(component_names & compatible)
+    return any(component_matches(component, available) for available in bank.get("components", []))
@@ -0,0 +1,114 @@
+"""Precompiled blood group and component normalization.
+
+Lookup tables are built once at import from blood_mappings so that
+normalizing a value or checking component compatibility is a dict/set
+lookup instead of a scan over every mapping entry.
+"""
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import FrozenSet, Optional
+
+from .blood_mappings import BLOOD_GROUP_MAPPING, COMPONENT_MAPPING
+
+
+def _alias_table(mapping) -> MappingProxyType:
+    table = {}
+    for standard, variants in mapping.items():
+        for variant in list(variants) + [standard]:
+            table.setdefault(variant.upper().strip(), standard)
+    return MappingProxyType(table)
+
+
+# Upper-cased alias -> canonical name
+BLOOD_GROUP_ALIASES = _alias_table(BLOOD_GROUP_MAPPING)
+COMPONENT_ALIASES = _alias_table(COMPONENT_MAPPING)
+
+CANONICAL_BLOOD_GROUPS = frozenset(BLOOD_GROUP_MAPPING)
+CANONICAL_COMPONENTS = frozenset(COMPONENT_MAPPING)
+
+# Lower-cased variants per canonical component, used for substring matching
+_COMPONENT_VARIANTS = MappingProxyType({
+    standard: frozenset(alias.lower() for alias, canonical in COMPONENT_ALIASES.items() if canonical == standard)
+    for standard in COMPONENT_MAPPING
+})
+
+
+def normalize_blood_group(blood_group: str) -> str:
+    """Canonical blood group (e.g. 'b+ve' -> 'B+'), or the input if unknown"""
+    return BLOOD_GROUP_ALIASES.get(blood_group.upper().strip(), blood_group)
+
+
+def normalize_component(component: str) -> str:
+    """Canonical component name (e.g. 'PRBC' -> 'Red Blood Cells'), or the input if unknown"""
+    return COMPONENT_ALIASES.get(component.upper().strip(), component)
+
+
+def _substring_match(requested_norm: str, available: str) -> bool:
+    """The original matching rule, for values outside the precomputed relation"""
+    req_lower = requested_norm.lower()
+    avail_lower = available.lower()
+    return (req_lower in avail_lower or avail_lower in req_lower or
+            any(variant in avail_lower for variant in _COMPONENT_VARIANTS.get(requested_norm, ())))
+
+
+# Canonical requested component -> lower-cased known component names it is satisfied by
+COMPONENT_COMPATIBILITY = MappingProxyType({
+    standard: frozenset(
+        alias.lower() for alias in COMPONENT_ALIASES
+        if _substring_match(standard, alias)
+    )
+    for standard in COMPONENT_MAPPING
+})
+
+# Canonical requested component -> canonical components it is satisfied by
+CANONICAL_COMPONENT_COMPATIBILITY = MappingProxyType({
+    standard: frozenset(
+        available for available in COMPONENT_MAPPING
+        if available.lower() in COMPONENT_COMPATIBILITY[standard]
+    )
+    for standard in COMPONENT_MAPPING
+})
+
+KNOWN_COMPONENT_NAMES = frozenset(alias.lower() for alias in COMPONENT_ALIASES)
+
+
+@lru_cache(maxsize=4096)
+def _unknown_component_match(requested_norm: str, available: str) -> bool:
+    return _substring_match(requested_norm, available)
+
+
+def component_matches(requested: str, available: str) -> bool:
+    """Check if a requested component is satisfied by an available one"""
+    requested_norm = normalize_component(requested)
+    avail_lower = available.lower()
+    compatible = COMPONENT_COMPATIBILITY.get(requested_norm)
+    if compatible is not None and avail_lower in KNOWN_COMPONENT_NAMES:
+        return avail_lower in compatible
+    return _unknown_component_match(requested_norm, available)
+
+
+def compatible_components(requested: str) -> FrozenSet[str]:
+    """Canonical components that satisfy a request (empty if the request is unknown)"""
+    return CANONICAL_COMPONENT_COMPATIBILITY.get(normalize_component(requested), frozenset())
+
+
+def _blood_group_pattern() -> re.Pattern:
+    # Longest aliases first so 'AB+VE' wins over 'AB+' and 'A POSITIVE' over 'A POS'
+    aliases = sorted(BLOOD_GROUP_ALIASES, key=len, reverse=True)
+    alternatives = "|".join(r"\s*".join(re.escape(part) for part in alias.split()) for alias in aliases)
+    return re.compile(rf"(?<![A-Za-z0-9])({alternatives})(?![A-Za-z])", re.IGNORECASE)
+
+
+BLOOD_GROUP_PATTERN = _blood_group_pattern()
+_COMPACT_BLOOD_GROUP_ALIASES = MappingProxyType({
+    alias.replace(" ", ""): canonical for alias, canonical in BLOOD_GROUP_ALIASES.items()
+})
+
+
+def extract_blood_group(text: str) -> Optional[str]:
+    """First blood group mentioned in free text, in canonical form"""
+    match = BLOOD_GROUP_PATTERN.search(text)
+    if not match:
+        return None
+    return _COMPACT_BLOOD_GROUP_ALIASES.get("".join(match.group(1).upper().split()))
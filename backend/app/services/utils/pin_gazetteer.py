@@ -0,0 +1,80 @@
+"""Offline PIN code gazetteer for placing blood banks on a map.
+
+Coordinates are approximate post office locations for the PIN codes in the
+fallback directory. Other PINs resolve to the centroid of their 3-digit
+sorting district prefix, so newly added banks are still placed
+(roughly) without a network lookup.
+"""
+import re
+from typing import Optional, Tuple
+
+PIN_PATTERN = re.compile(r"(?<!\d)([1-9]\d{2})\s?(\d{3})(?!\d)")
+
+# PIN -> (latitude, longitude)
+PIN_COORDINATES = {
+    "600001": (13.0900, 80.2870),
+    "600003": (13.0810, 80.2750),
+    "600006": (13.0600, 80.2540),
+    "600113": (13.0000, 80.2480),
+    "600116": (13.0350, 80.1580),
+    "641014": (11.0300, 77.0200),
+    "625020": (9.9270, 78.1350),
+    "625107": (9.9500, 78.1650),
+    "620008": (10.8050, 78.6800),
+    "636030": (11.6600, 78.1400),
+    "560002": (12.9630, 77.5750),
+    "560017": (12.9600, 77.6480),
+    "560076": (12.8960, 77.5990),
+    "570001": (12.3100, 76.6500),
+    "682016": (9.9700, 76.2850),
+    "682011": (9.9750, 76.2800),
+    "695011": (8.5240, 76.9280),
+    "673008": (11.2700, 75.8350),
+    "500003": (17.4400, 78.5000),
+    "500082": (17.4250, 78.4500),
+    "530002": (17.7100, 83.3000),
+    "400012": (19.0030, 72.8420),
+    "411001": (18.5250, 73.8720),
+    "110029": (28.5670, 77.2100),
+    "110001": (28.6320, 77.2200)
+}
+
+# 3-digit PIN prefix (sorting district) -> approximate centroid
+PIN_PREFIX_CENTROIDS = {
+    "110": (28.6100, 77.2100),
+    "400": (19.0800, 72.8800),
+    "411": (18.5200, 73.8600),
+    "500": (17.3900, 78.4900),
+    "530": (17.6900, 83.2200),
+    "560": (12.9700, 77.5900),
+    "570": (12.3000, 76.6400),
+    "600": (13.0800, 80.2700),
+    "620": (10.8000, 78.6900),
+    "625": (9.9300, 78.1200),
+    "636": (11.6600, 78.1500),
+    "641": (11.0200, 76.9700),
+    "673": (11.2600, 75.7800),
+    "682": (9.9700, 76.2800),
+    "695": (8.5200, 76.9400)
+}
+
+PIN_PRECISION = "pin"
+PREFIX_PRECISION = "pin_prefix"
+
+
+def extract_pin(address: str) -> Optional[str]:
+    """Last 6-digit PIN code in an address"""
+    matches = PIN_PATTERN.findall(address or "")
+    if not matches:
+        return None
+    prefix, suffix = matches[-1]
+    return prefix + suffix
+
+
+def resolve_pin(pin: str) -> Optional[Tuple[float, float, str]]:
+    """(latitude, longitude, precision) for a PIN code, or None if unknown"""
+    if pin in PIN_COORDINATES:
+        return (*PIN_COORDINATES[pin], PIN_PRECISION)
+    if pin[:3] in PIN_PREFIX_CENTROIDS:
+        return (*PIN_PREFIX_CENTROIDS[pin[:3]], PREFIX_PRECISION)
+    return None
@@ -0,0 +1,86 @@
+"""Bounded TTL cache with stale-while-revalidate support"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable
+
+FRESH = "hit"
+STALE = "stale"
+MISS = "miss"
+
+
+@dataclass
+class CacheLookup:
+    status: str
+    value: Any = None
+    age: float = 0.0
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries are fresh for ``ttl`` seconds.
+
+    After ``ttl`` an entry is still served as stale for ``stale_ttl`` more
+    seconds so the caller can return it immediately and refresh in the
+    background. Beyond that window the entry counts as a miss.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> CacheLookup:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return CacheLookup(MISS)
+
+            stored_at, value = entry
+            age = now - stored_at
+            if age <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return CacheLookup(FRESH, value, age)
+            if age <= self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return CacheLookup(STALE, value, age)
+
+            del self._entries[key]
+            self.misses += 1
+            return CacheLookup(MISS)
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses
+            }
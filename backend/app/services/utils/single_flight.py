@@ -0,0 +1,67 @@
+"""Single-flight coalescing of concurrent identical calls"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a waiter when the shared call does not finish in time"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one call per key at a time.
+
+    The first caller for a key executes ``fn``; callers arriving while it
+    runs wait for the same outcome. A raised exception is re-raised to every
+    caller. Waiters give up after ``timeout`` seconds without cancelling the
+    shared call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Return ``(result, shared)`` where ``shared`` is True for waiters"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for in-flight call {key!r}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiters": sum(call.waiters for call in self._calls.values())
+            }
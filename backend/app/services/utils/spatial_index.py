@@ -0,0 +1,125 @@
+"""KD-tree over points on the Earth's surface for nearest-k and radius queries.
+
+Points are stored as 3D unit vectors, where straight-line (chord)
+distance increases monotonically with great-circle distance. That lets a
+plain Euclidean KD-tree answer geographic queries with no distortion near
+the poles or the antimeridian. A query visits O(log n) nodes, which keeps
+it well under a millisecond even for a national directory of blood banks.
+"""
+import heapq
+import math
+from typing import Generic, List, Optional, Sequence, Tuple, TypeVar
+
+EARTH_RADIUS_KM = 6371.0088
+
+T = TypeVar("T")
+
+
+def to_unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlam = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _chord_for_km(km: float) -> float:
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def _km_for_chord(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class GeoKDTree(Generic[T]):
+    """Static KD-tree of (lat, lon, item) points"""
+
+    def __init__(self, points: Sequence[Tuple[float, float, T]]):
+        self._items: List[T] = [item for _, _, item in points]
+        self._vectors = [to_unit_vector(lat, lon) for lat, lon, _ in points]
+        # Node arrays: point index, split axis, left child, right child (-1 = none)
+        self._point: List[int] = []
+        self._axis: List[int] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+        self._root = self._build(list(range(len(points))))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _build(self, indices: List[int]) -> int:
+        if not indices:
+            return -1
+        # Split on the axis with the widest spread
+        spreads = [
+            max(self._vectors[i][axis] for i in indices) - min(self._vectors[i][axis] for i in indices)
+            for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        indices.sort(key=lambda i: self._vectors[i][axis])
+        median = len(indices) // 2
+
+        node = len(self._point)
+        self._point.append(indices[median])
+        self._axis.append(axis)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._left[node] = self._build(indices[:median])
+        self._right[node] = self._build(indices[median + 1:])
+        return node
+
+    def _search(self, target: Tuple[float, float, float], k: Optional[int], max_chord: float) -> List[Tuple[float, int]]:
+        """(chord distance, point index) within max_chord, the k nearest if k is set"""
+        heap: List[Tuple[float, int]] = []  # max-heap of the best k via negated distances
+        bound_sq = max_chord * max_chord
+        # (node, squared distance from the target to the node's splitting plane)
+        stack = [(self._root, 0.0)] if self._root >= 0 else []
+        while stack:
+            node, plane_sq = stack.pop()
+            if plane_sq > bound_sq:
+                continue
+            index = self._point[node]
+            vector = self._vectors[index]
+            dist_sq = ((vector[0] - target[0]) ** 2 + (vector[1] - target[1]) ** 2 +
+                       (vector[2] - target[2]) ** 2)
+            if dist_sq <= bound_sq:
+                if k is None:
+                    heap.append((dist_sq, index))
+                elif len(heap) < k:
+                    heapq.heappush(heap, (-dist_sq, index))
+                    if len(heap) == k:
+                        bound_sq = -heap[0][0]
+                elif dist_sq < -heap[0][0]:
+                    heapq.heapreplace(heap, (-dist_sq, index))
+                    bound_sq = -heap[0][0]
+
+            axis = self._axis[node]
+            delta = target[axis] - vector[axis]
+            near, far = (self._left[node], self._right[node]) if delta < 0 else (self._right[node], self._left[node])
+            # Push far first so the near side is explored first and tightens the bound
+            if far >= 0 and delta * delta <= bound_sq:
+                stack.append((far, delta * delta))
+            if near >= 0:
+                stack.append((near, 0.0))
+
+        if k is not None:
+            heap = [(-neg, index) for neg, index in heap]
+        return sorted((math.sqrt(dist_sq), index) for dist_sq, index in heap)
+
+    def nearest(self, lat: float, lon: float, k: int = 5,
+                max_km: Optional[float] = None) -> List[Tuple[float, T]]:
+        """Up to k (distance km, item) pairs, nearest first"""
+        if k <= 0:
+            return []
+        max_chord = _chord_for_km(max_km) if max_km is not None else 2.0
+        matches = self._search(to_unit_vector(lat, lon), k, max_chord)
+        return [(_km_for_chord(chord), self._items[index]) for chord, index in matches]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, T]]:
+        """Every (distance km, item) within radius_km, nearest first"""
+        matches = self._search(to_unit_vector(lat, lon), None, _chord_for_km(radius_km))
+        return [(_km_for_chord(chord), self._items[index]) for chord, index in matches]
@@ -0,0 +1,162 @@
+"""gzip/brotli response compression middleware.
+
+Brotli is used when the optional ``brotli`` package is installed and the
+client accepts it; otherwise gzip. Bodies smaller than ``minimum_size``
+are sent as-is, and so are event streams (NDJSON/SSE), where buffering
+inside a compressor would delay each event.
+"""
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+class _GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _accepted_encodings(header: str) -> List[Tuple[str, float]]:
+    encodings = []
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings.append((name.strip().lower(), quality))
+    return encodings
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, accept_encoding: str) -> Optional[str]:
+        accepted = {name: quality for name, quality in _accepted_encodings(accept_encoding) if quality > 0}
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._choose(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, middleware: CompressionMiddleware):
+        self._send = send
+        self._encoding = encoding
+        self._middleware = middleware
+        self._start: Optional[Message] = None
+        self._compressor = None
+        self._passthrough = False
+
+    def _new_compressor(self):
+        if self._encoding == "br":
+            return _BrotliCompressor(self._middleware.brotli_quality)
+        return _GzipCompressor(self._middleware.gzip_level)
+
+    def _set_encoding_headers(self, headers: MutableHeaders):
+        headers["Content-Encoding"] = self._encoding
+        headers.add_vary_header("Accept-Encoding")
+        # The compressed bytes differ from the identity representation
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "")
+            self._passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or media_type.startswith(UNCOMPRESSED_MEDIA_TYPES)
+            )
+            if self._passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is None:
+            headers = MutableHeaders(raw=self._start["headers"])
+            if not more_body:
+                # Whole body in one message: compress it in one go, if it is worth it
+                if len(body) < self._middleware.minimum_size:
+                    self._passthrough = True
+                    await self._send(self._start)
+                    await self._send(message)
+                    return
+                compressor = self._new_compressor()
+                compressed = compressor.compress(body) + compressor.finish()
+                self._set_encoding_headers(headers)
+                headers["Content-Length"] = str(len(compressed))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+
+            # Streaming body: compress chunk by chunk
+            self._compressor = self._new_compressor()
+            self._set_encoding_headers(headers)
+            del headers["Content-Length"]
+            await self._send(self._start)
+
+        chunk = self._compressor.compress(body)
+        if not more_body:
+            chunk += self._compressor.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
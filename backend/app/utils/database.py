@@ -1,8 +1,13 @@
 # backend/app/utils/database.py
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import Table, create_engine, inspect, literal
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from decouple import config
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = config("DATABASE_URL", default="sqlite:///./thalassist.db")
 
 if DATABASE_URL.startswith("sqlite"):
@@ -15,6 +20,38 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # SINGLE Base
 Base = declarative_base()
 
+def add_missing_columns(bind: Engine, table: Table):
+    """ALTER an existing table to add model columns it predates.
+
+    create_all skips tables that already exist, so databases created by an
+    earlier release would otherwise fail with "no such column". New columns
+    get their scalar model default; rows that have none stay NULL.
+    """
+    existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in existing]
+    if not missing:
+        return
+
+    preparer = bind.dialect.identifier_preparer
+    with bind.begin() as connection:
+        for column in missing:
+            ddl = (f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                   f"{preparer.format_column(column)} {column.type.compile(dialect=bind.dialect)}")
+            if column.default is not None and column.default.is_scalar:
+                default = literal(column.default.arg, column.type).compile(
+                    dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+                )
+                ddl += f" DEFAULT {default}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            connection.exec_driver_sql(ddl)
+            logger.info(f"Added column {table.name}.{column.name}")
+
+    for index in table.indexes:
+        if any(column in missing for column in index.columns):
+            index.create(bind, checkfirst=True)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,93 @@
+"""ETag / Last-Modified validators and 304 Not Modified handling"""
+import hashlib
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from fastapi import Request
+from starlette.responses import Response
+
+from .responses import FastJSONResponse, dumps
+
+REVALIDATE = "no-cache"
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def weak_etag(*parts: Any) -> str:
+    return 'W/"' + hashlib.sha1(dumps(parts)).hexdigest()[:20] + '"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check using weak comparison, as RFC 9110 requires for GET"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def not_modified_since(request: Request, last_modified: datetime) -> bool:
+    """If-Modified-Since check; ignored when If-None-Match is present"""
+    header = request.headers.get("if-modified-since")
+    if not header or "if-none-match" in request.headers:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+class CachedRepresentation:
+    """A rarely-changing JSON body, rendered once with its validators.
+
+    The builder runs on first use (or after ``invalidate``); later requests
+    reuse the rendered bytes, and clients presenting the current ETag or a
+    recent If-Modified-Since get 304 without the body being rebuilt.
+    """
+
+    def __init__(self, builder: Callable[[], Any]):
+        self._builder = builder
+        self._lock = threading.Lock()
+        self._rendered = None
+
+    def _render(self):
+        with self._lock:
+            if self._rendered is None:
+                body = dumps(self._builder())
+                self._rendered = (body, strong_etag(body), datetime.now(timezone.utc))
+            return self._rendered
+
+    def invalidate(self):
+        with self._lock:
+            self._rendered = None
+
+    def respond(self, request: Request) -> Response:
+        body, etag, last_modified = self._render()
+        if etag_matches(request, etag) or not_modified_since(request, last_modified):
+            return not_modified(etag, last_modified)
+        return Response(body, media_type=FastJSONResponse.media_type,
+                        headers=validator_headers(etag, last_modified))
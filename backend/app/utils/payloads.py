@@ -0,0 +1,148 @@
+"""Response shaping: compact availability results, field projection and cursors"""
+import base64
+import binascii
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Cursor is malformed or was issued for a different query"""
+
+
+def query_fingerprint(*parts) -> str:
+    """Short digest tying a cursor to the query that issued it"""
+    return hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(position: Dict, fingerprint: str) -> str:
+    payload = json.dumps({"p": position, "q": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> Dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        position, issued_for = payload["p"], payload["q"]
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeEncodeError):
+        raise InvalidCursor("Malformed cursor")
+    if issued_for != fingerprint or not isinstance(position, dict):
+        raise InvalidCursor("Cursor does not belong to this query")
+    return position
+
+
+def cursor_offset(cursor: Optional[str], fingerprint: str) -> int:
+    """Offset encoded in an offset cursor; 0 without a cursor"""
+    if not cursor:
+        return 0
+    offset = decode_cursor(cursor, fingerprint).get("offset")
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor("Malformed cursor")
+    return offset
+
+
+def cursor_after(cursor: Optional[str], fingerprint: str, fields: Tuple[str, ...]) -> Optional[Tuple[int, ...]]:
+    """Keyset position encoded in a cursor as integer ``fields``; None without a cursor"""
+    if not cursor:
+        return None
+    position = decode_cursor(cursor, fingerprint)
+    values = tuple(position.get(field) for field in fields)
+    if not all(isinstance(value, int) and value >= 0 for value in values):
+        raise InvalidCursor("Malformed cursor")
+    return values
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """'name, phone' -> ['name', 'phone']; None or blank means no projection"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    return names or None
+
+
+def project(items: Iterable[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Keep only the requested keys of each item"""
+    if fields is None:
+        return list(items)
+    return [{name: item[name] for name in fields if name in item} for item in items]
+
+
+def paginate(items: List[Dict], limit: Optional[int], offset: int) -> Tuple[List[Dict], Optional[int]]:
+    """One page of items and the offset of the next page, if any"""
+    if limit is None:
+        return items[offset:], None
+    end = offset + limit
+    return items[offset:end], (end if end < len(items) else None)
+
+
+def _bank_container(primary: Dict) -> Optional[Dict]:
+    """The dict holding blood_banks in a primary result (scraped sources nest it under results)"""
+    if isinstance(primary.get("blood_banks"), list):
+        return primary
+    results = primary.get("results")
+    if isinstance(results, dict) and isinstance(results.get("blood_banks"), list):
+        return results
+    return None
+
+
+def compact_availability(result: Dict) -> Dict:
+    """Drop strategies_attempted[].data; the winning strategy's data is primary_result"""
+    compacted = dict(result)
+    strategies = []
+    for attempt in result.get("strategies_attempted", []):
+        attempt = dict(attempt)
+        if "data" in attempt:
+            data = attempt.pop("data")
+            attempt["data_in_primary_result"] = data is result.get("primary_result")
+        strategies.append(attempt)
+    compacted["strategies_attempted"] = strategies
+    return compacted
+
+
+def shape_availability(result: Dict, compact: bool, fields: Optional[List[str]],
+                       limit: Optional[int], cursor: Optional[str], fingerprint: str) -> Dict:
+    """Apply compact mode, bank field projection and bank pagination to an availability result"""
+    if compact:
+        result = compact_availability(result)
+
+    primary = result.get("primary_result")
+    container = _bank_container(primary) if isinstance(primary, dict) else None
+    if container is None or (fields is None and limit is None and cursor is None):
+        return result
+
+    offset = cursor_offset(cursor, fingerprint)
+    banks, next_offset = paginate(container["blood_banks"], limit, offset)
+
+    shaped_container = dict(container, blood_banks=project(banks, fields))
+    shaped_primary = shaped_container if container is primary else dict(primary, results=shaped_container)
+    shaped = dict(result, primary_result=shaped_primary)
+    shaped["page"] = {
+        "offset": offset,
+        "returned": len(banks),
+        "total": len(container["blood_banks"]),
+        "next_cursor": encode_cursor({"offset": next_offset}, fingerprint) if next_offset is not None else None
+    }
+    return shaped
+
+
+def compact_donor_match(result: Dict) -> Dict:
+    """Hoist the urgency context shared by every donor to the top level and drop static tips"""
+    compacted = {key: value for key, value in result.items() if key not in ("search_tips", "emergency_alternatives")}
+    if result.get("emergency_alternatives") is not None:
+        compacted["emergency_alternatives"] = result["emergency_alternatives"]
+
+    shared_context = None
+    donors = []
+    for donor in result.get("donors", []):
+        donor = dict(donor)
+        context = donor.pop("urgency_context", None) or {}
+        if shared_context is None:
+            shared_context = {key: value for key, value in context.items() if key != "availability"}
+        if "availability" in context:
+            donor["availability"] = context["availability"]
+        donors.append(donor)
+    compacted["donors"] = donors
+    if shared_context is not None:
+        compacted["urgency_context"] = shared_context
+    return compacted
@@ -0,0 +1,68 @@
+"""orjson-backed JSON responses.
+
+FastJSONResponse serializes with orjson, which handles datetimes, Enums
+(MessageCategory, UrgencyLevel), dataclasses and numpy arrays natively.
+FastJSONRoute goes further for endpoints without a response_model: the
+handler's return value is wrapped in a FastJSONResponse directly, which
+skips FastAPI's recursive jsonable_encoder pass over the whole payload.
+"""
+import asyncio
+import functools
+from decimal import Decimal
+from typing import Any, Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.responses import Response
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson does not serialize natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRoute(APIRoute):
+    """APIRoute that serializes response_model-less endpoints straight to FastJSONResponse"""
+
+    def get_route_handler(self) -> Callable:
+        if self.response_field is None and self.dependant.call is not None:
+            self.dependant.call = self._wrap(self.dependant.call)
+        return super().get_route_handler()
+
+    def _wrap(self, call: Callable) -> Callable:
+        status_code = self.status_code or 200
+
+        def to_response(content: Any) -> Any:
+            if isinstance(content, Response):
+                return content
+            return FastJSONResponse(content, status_code=status_code)
+
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def endpoint(*args, **kwargs):
+                return to_response(await call(*args, **kwargs))
+        else:
+            @functools.wraps(call)
+            def endpoint(*args, **kwargs):
+                return to_response(call(*args, **kwargs))
+        return endpoint
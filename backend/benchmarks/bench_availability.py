@@ -0,0 +1,167 @@
+"""End-to-end latency benchmark for BloodBankService against the eRaktKosh stand-in.
+
+Starts benchmarks.eraktkosh_standin on a free port, points a
+BloodBankService at it (mirror discovery, scraping and test_connectivity)
+and drives ``get_blood_availability`` and ``test_connectivity``. Reports
+p50/p95/p99 latency, throughput, and upstream requests and bytes per
+lookup, as counted by the stand-in.
+
+    cd backend && python -m benchmarks.bench_availability [--lookups 200] [--concurrency 8]
+        [--latency 0.05 --jitter 0.05 --error-rate 0.02 --rows 25 --padding 0]
+        [--harvest] [--max-p95-ms 500] [--json results.json]
+
+Lookups cycle through distinct (district, blood group, component)
+combinations, so the result cache only answers once every combination
+has been seen. ``--harvest`` fills the stock snapshot first so that
+lookups are answered locally. ``--max-p95-ms`` exits non-zero when the
+lookup p95 exceeds the budget, which lets CI gate regressions offline.
+"""
+import argparse
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.services.blood_service import BloodBankService
+from app.services.stock_harvester import StockSnapshotStore
+from benchmarks.eraktkosh_standin import StandInConfig, serve
+from benchmarks.pages import BLOOD_GROUPS, COMPONENTS, SAMPLE_GEOGRAPHY
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def lookup_queries() -> Callable[[], tuple]:
+    """Thread-safe supplier cycling through every (state, district, blood group, component)"""
+    locations = [(state, district) for state, districts in SAMPLE_GEOGRAPHY.values() for district in districts]
+    queries = itertools.cycle([
+        (state, district, blood_group, component)
+        for component in COMPONENTS
+        for blood_group in BLOOD_GROUPS
+        for state, district in locations
+    ])
+    lock = threading.Lock()
+
+    def next_query():
+        with lock:
+            return next(queries)
+    return next_query
+
+
+def run_timed(label: str, fn: Callable[[], Dict], count: int, concurrency: int, config: StandInConfig) -> Dict:
+    config.stats.reset()
+    latencies = []
+    sources = {}
+
+    def timed():
+        started = time.perf_counter()
+        result = fn()
+        latencies.append(time.perf_counter() - started)
+        return result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for result in pool.map(lambda _: timed(), range(count)):
+            source = (result.get("primary_result") or {}).get("source", "n/a")
+            sources[source] = sources.get(source, 0) + 1
+    elapsed = time.perf_counter() - started
+    upstream = config.stats.snapshot()
+
+    return {
+        "label": label,
+        "count": count,
+        "concurrency": concurrency,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "throughput_per_s": count / elapsed,
+        "upstream_requests_per_call": upstream["requests"] / count,
+        "upstream_errors": upstream["errors"],
+        "bytes_per_call": upstream["bytes_sent"] / count,
+        "sources": sources
+    }
+
+
+def print_report(stats: Dict):
+    print(
+        f"{stats['label']:<22} n={stats['count']:<5} c={stats['concurrency']:<3} "
+        f"p50 {stats['p50_ms']:>8.1f} ms  p95 {stats['p95_ms']:>8.1f} ms  p99 {stats['p99_ms']:>8.1f} ms  "
+        f"{stats['throughput_per_s']:>8.1f}/s  {stats['upstream_requests_per_call']:>5.2f} req/call  "
+        f"{stats['bytes_per_call'] / 1024:>8.1f} KiB/call"
+    )
+    print(f"{'':<22} sources: {stats['sources']}  upstream 5xx: {stats['upstream_errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--connectivity-runs", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rows", type=int, default=25)
+    parser.add_argument("--padding", type=int, default=0)
+    parser.add_argument("--fixtures", type=Path, help="directory of recorded pages to replay")
+    parser.add_argument("--harvest", action="store_true", help="harvest the stock snapshot before the lookups")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if the lookup p95 exceeds this budget")
+    parser.add_argument("--json", type=Path, help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.CRITICAL)
+    config = StandInConfig(args.fixtures, args.rows, args.latency, args.jitter, args.error_rate, args.padding)
+    server = serve(0, config)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    service = BloodBankService(
+        mirror_urls=[base_url],
+        snapshot_store=StockSnapshotStore(":memory:"),
+        connectivity_urls=[base_url, base_url + "/BLDAHIMS/bloodbank/stockAvailability.cnt"]
+    )
+    try:
+        print(f"stand-in {base_url}: mirror {service.discovery.probe().value}")
+        if args.harvest:
+            summary = service.harvester.run_once()
+            print(f"harvest: {summary}")
+
+        next_query = lookup_queries()
+        results = [
+            run_timed(
+                "get_blood_availability",
+                lambda: service.get_blood_availability(*next_query()),
+                args.lookups, args.concurrency, config
+            ),
+            run_timed(
+                "test_connectivity",
+                service.test_connectivity,
+                args.connectivity_runs, 1, config
+            )
+        ]
+    finally:
+        service.engine.close()
+        server.shutdown()
+
+    for stats in results:
+        print_report(stats)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+    lookup_p95 = results[0]["p95_ms"]
+    if args.max_p95_ms is not None and lookup_p95 > args.max_p95_ms:
+        print(f"FAIL: lookup p95 {lookup_p95:.1f} ms exceeds budget {args.max_p95_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Donor search latency at scale: DonorIndex versus a full scan.
+
+Generates synthetic donors spread over ``--cities`` districts, loads them
+into a DonorService's index and times, per query:
+
+- scan: the pre-index filter loop (group list membership, location
+  substring test, strptime for urgent requests) over every donor
+- index: DonorIndex.candidates for the same filters
+- match: DonorTable.match, the same filters as column masks
+- rank: DonorTable.rank of the candidates and its first page of 10
+- find_donors: the full service call
+- pages 2-3: find_donors for the next two pages, following the keyset
+  cursor from the previous page (served from the cached ranking)
+- phenotype: find_phenotype_matches for a K/E-alloimmunised patient
+- statistics: get_donor_statistics for the query's location
+
+    cd backend && python -m benchmarks.bench_donor_match [--donors 1000000] [--queries 300] [--regional 0.1]
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.services.donor_repository import DonorRepository
+from app.services.donor_service import DonorService
+from app.services.utils.blood_mappings import BLOOD_COMPATIBILITY, compatible_donor_groups
+from benchmarks.bench_availability import percentile
+from benchmarks.pages import BLOOD_GROUPS, SAMPLE_GEOGRAPHY
+
+URGENCIES = ["normal", "urgent", "emergency"]
+TYPED_ANTIGENS = ["C", "c", "E", "e", "K", "Jka", "Jkb"]
+
+
+def make_locations(count: int) -> List[str]:
+    locations = [f"{district}, {state}" for state, districts in SAMPLE_GEOGRAPHY.values() for district in districts]
+    states = [state for state, _ in SAMPLE_GEOGRAPHY.values()]
+    while len(locations) < count:
+        locations.append(f"District {len(locations)}, {states[len(locations) % len(states)]}")
+    return locations[:count]
+
+
+def make_donors(count: int, locations: List[str], rng: random.Random) -> List[Dict]:
+    today = date.today()
+    donors = []
+    for i in range(count):
+        eligible = today + timedelta(days=rng.randint(-200, 90))
+        donors.append({
+            "id": f"S{i + 1:07d}",
+            "name": f"Donor {i}",
+            "blood_group": rng.choice(BLOOD_GROUPS),
+            "location": rng.choice(locations),
+            "phone": f"+91-9{i:09d}",
+            "email": "",
+            "eligible_next": eligible.isoformat(),
+            "status": "available" if eligible <= today else "not_available",
+            "verified": rng.random() < 0.7,
+            "donation_count": rng.randint(0, 20),
+            # Most regular donors have been extended-typed
+            "antigen_profile": " ".join(
+                f"{name}{rng.choice('+-')}" for name in TYPED_ANTIGENS
+            ) if rng.random() < 0.6 else None
+        })
+    return donors
+
+
+def scan(donors: List[Dict], blood_group: str, location: str, urgency: str) -> List[Dict]:
+    """The filter loop find_donors ran over every donor before the index"""
+    compatible_groups = BLOOD_COMPATIBILITY.get(blood_group, [blood_group])
+    location_parts = [part.strip().lower() for part in location.split(',')]
+    matches = []
+    for donor in donors:
+        if donor["blood_group"] not in compatible_groups:
+            continue
+        if not any(part in donor["location"].lower() for part in location_parts):
+            continue
+        if urgency == "urgent":
+            if donor["status"] != "available":
+                if datetime.strptime(donor["eligible_next"], "%Y-%m-%d") > datetime.now() + timedelta(days=30):
+                    continue
+        elif urgency != "emergency" and donor["status"] != "available":
+            continue
+        matches.append(donor)
+    return matches
+
+
+def timed(fn, queries) -> List[float]:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(*query)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--donors", type=int, default=1_000_000)
+    parser.add_argument("--cities", type=int, default=700)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--scan-queries", type=int, default=5, help="the full scan is slow; time fewer queries")
+    parser.add_argument("--regional", type=float, default=0.1, help="share of state-wide searches")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    rng = random.Random(args.seed)
+    locations = make_locations(args.cities)
+    donors = make_donors(args.donors, locations, rng)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    service = DonorService(DonorRepository(sessionmaker(bind=engine)))
+    started = time.perf_counter()
+    # Synthetic donors go straight into the index, table and statistics, after the seeded sample donors
+    first_key = service.index.last_key + 1
+    for key, donor in enumerate(donors, start=first_key):
+        service._apply(key, donor)
+    print(f"indexed {len(service.index)} donors in {time.perf_counter() - started:.1f}s")
+
+    # Mostly city searches; --regional of them name a whole state (regional drives)
+    states = [state for state, _ in SAMPLE_GEOGRAPHY.values()]
+    queries = [
+        (
+            rng.choice(BLOOD_GROUPS),
+            rng.choice(states) if rng.random() < args.regional else rng.choice(locations).split(",")[0],
+            rng.choice(URGENCIES)
+        )
+        for _ in range(args.queries)
+    ]
+    cutoff = (datetime.now() + timedelta(days=30)).date()
+
+    def index_lookup(blood_group, location, urgency):
+        groups = compatible_donor_groups(blood_group)
+        return service.index.candidates(groups, location, urgency, cutoff)
+
+    def column_match(blood_group, location, urgency):
+        return service.table.match(blood_group, location, urgency, cutoff)
+
+    # The scan's substring test is looser ("District 1" also hits "District 10"), so compare as subsets
+    for blood_group, location, urgency in queries[:args.scan_queries]:
+        scanned = {donor["id"] for donor in scan(donors, blood_group, location, urgency)}
+        indexed = index_lookup(blood_group, location, urgency)
+        assert {service.index.get(key)["id"] for key in indexed if key >= first_key} <= scanned
+        assert service.table.rows_for(indexed).tolist() == column_match(blood_group, location, urgency).tolist()
+
+    candidate_rows = {query: column_match(*query) for query in queries}
+
+    def rank(blood_group, location, urgency):
+        return service.table.rank(candidate_rows[(blood_group, location, urgency)], blood_group, location).page(10)
+
+    first_pages = {}
+
+    def first_page(blood_group, location, urgency):
+        first_pages[(blood_group, location, urgency)] = service.find_donors(blood_group, location, urgency)["next_after"]
+
+    def later_pages(blood_group, location, urgency):
+        after = first_pages[(blood_group, location, urgency)]
+        for _ in range(2):
+            if after is None:
+                break
+            after = service.find_donors(blood_group, location, urgency, after=after)["next_after"]
+
+    results = {
+        "scan": timed(lambda *q: scan(donors, *q), queries[:args.scan_queries]),
+        "index": timed(index_lookup, queries),
+        "match": timed(column_match, queries),
+        "rank": timed(rank, queries),
+        # Each query's first page scores its match set; pages 2-3 reuse that ranking
+        "find_donors": timed(first_page, queries),
+        "pages 2-3": timed(later_pages, queries),
+        "phenotype": timed(
+            lambda *q: service.find_phenotype_matches(*q[:2], "anti-K, anti-E", "C+ c+ E- e+ K-", q[2]), queries
+        ),
+        "statistics": timed(lambda *q: service.get_donor_statistics(q[1]), queries)
+    }
+    print(f"{'path':<12} {'queries':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for label, samples in results.items():
+        print(
+            f"{label:<12} {len(samples):>8} {percentile(samples, 50) * 1e3:>9.3f} "
+            f"{percentile(samples, 95) * 1e3:>9.3f} {percentile(samples, 99) * 1e3:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Parse-time and memory benchmark for eRaktKosh result/portal page parsing.
+
+Compares the previous BeautifulSoup(html.parser) full-tree parsing with the
+lxml extraction layer in app.services.utils.html_parsing. Pass saved pages
+as arguments to benchmark real portal output; otherwise synthetic pages of
+increasing size are generated.
+
+    cd backend && python -m benchmarks.bench_html_parsing [saved_page.html ...]
+
+Memory is the tracemalloc peak, i.e. Python-heap allocations. libxml2
+allocates its tree outside the Python heap, so the lxml figure excludes the
+(compact) C tree; the BeautifulSoup figure is its entire tree.
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.services.utils.html_parsing import analyze_page_structure, parse_result_tables
+from benchmarks.pages import make_portal_page, make_results_page
+
+
+def legacy_parse_result_tables(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    blood_banks = []
+    for table in soup.find_all('table'):
+        rows = table.find_all('tr')
+        if len(rows) < 2:
+            continue
+        headers = [th.get_text(strip=True).lower() for th in rows[0].find_all(['th', 'td'])]
+        if not any(keyword in ' '.join(headers) for keyword in ['blood', 'bank', 'hospital', 'availability']):
+            continue
+        for row in rows[1:]:
+            cells = [td.get_text(strip=True) for td in row.find_all('td')]
+            if len(cells) < 2:
+                continue
+            blood_banks.append({headers[i]: cell for i, cell in enumerate(cells) if i < len(headers)})
+    return blood_banks
+
+
+def legacy_analyze_page_structure(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    analysis = {
+        "forms": len(soup.find_all('form')),
+        "select_elements": len(soup.find_all('select')),
+        "input_elements": len(soup.find_all('input')),
+        "ajax_calls": []
+    }
+    for script in soup.find_all('script'):
+        if script.string:
+            for pattern in ['$.ajax', '$.get', '$.post', 'XMLHttpRequest', 'fetch(']:
+                if pattern in script.string:
+                    analysis["ajax_calls"].append(pattern)
+    return analysis
+
+
+def measure(fn, html, repeat):
+    fn(html)  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def report(label, html, legacy, fast, repeat):
+    legacy_time, legacy_peak = measure(legacy, html, repeat)
+    fast_time, fast_peak = measure(fast, html, repeat)
+    print(
+        f"{label:<28} {len(html) / 1024:>8.0f} KiB "
+        f"{legacy_time * 1000:>10.2f} {fast_time * 1000:>10.2f} {legacy_time / fast_time:>7.1f}x "
+        f"{legacy_peak / 1024 / 1024:>10.2f} {fast_peak / 1024 / 1024:>10.2f}"
+    )
+
+
+def main(paths):
+    print(f"{'page':<28} {'size':>12} {'bs4 ms':>10} {'lxml ms':>10} {'speedup':>8} {'bs4 MiB':>10} {'lxml MiB':>10}")
+
+    if paths:
+        pages = [(Path(p).name, Path(p).read_text(encoding='utf-8', errors='replace')) for p in paths]
+    else:
+        pages = [(f"results ({rows} rows)", make_results_page(rows)) for rows in (50, 500, 5000)]
+
+    for label, html in pages:
+        assert len(legacy_parse_result_tables(html)) == len(parse_result_tables(html))
+        repeat = 3 if len(html) > 1_000_000 else 10
+        report(label, html, legacy_parse_result_tables, parse_result_tables, repeat)
+
+    portal = make_portal_page()
+    report("portal structure analysis", portal, legacy_analyze_page_structure, analyze_page_structure, 20)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
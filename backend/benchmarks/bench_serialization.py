@@ -0,0 +1,92 @@
+"""Per-request serialization cost of the heaviest API payloads.
+
+Compares FastAPI's default path, jsonable_encoder followed by
+JSONResponse.render (json.dumps), with FastJSONResponse.render (orjson),
+which FastJSONRoute calls directly for endpoints without a response_model.
+
+    cd backend && python -m benchmarks.bench_serialization [--repeat 2000]
+"""
+import argparse
+import json
+import logging
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.services.blood_service import BloodBankService
+from app.services.chatbot_service import AIChatbotService
+from app.services.donor_repository import DonorRepository
+from app.services.donor_service import DonorService
+from app.services.stock_harvester import StockSnapshotStore
+from app.utils.responses import FastJSONResponse
+from benchmarks.pages import make_results_page
+
+DEFAULT_RENDER = JSONResponse(None).render
+FAST_RENDER = FastJSONResponse(None).render
+
+
+def faq_topics(chatbot: AIChatbotService):
+    # Same shape as /api/faq/topics, with the raw FAQ entries (Enum categories) attached
+    return {"faq_topics": [
+        dict(data, topic=key.replace("_", " ").title()) for key, data in chatbot.faq_database.items()
+    ]}
+
+
+def payloads():
+    blood_service = BloodBankService(snapshot_store=StockSnapshotStore(":memory:"))
+    chatbot = AIChatbotService()
+    # Private in-memory donor table, so the benchmark never writes to the app database
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    donors = DonorService(DonorRepository(sessionmaker(bind=engine)))
+    for i in range(200):
+        donors.register_donor({
+            "name": f"Donor {i}", "blood_group": ["O+", "O-", "A+", "B+"][i % 4],
+            "location": "Chennai, Tamil Nadu", "phone": f"+91-90000{i:05d}", "email": f"donor{i}@example.com"
+        })
+
+    availability = blood_service._fetch_blood_availability("Tamil Nadu", "Chennai", "O+", "Whole Blood")
+    scraped = blood_service._parse_results_page(make_results_page(200))
+    availability_scraped = dict(availability, primary_result={"source": "form_submission", "results": scraped})
+    try:
+        return {
+            "/api/faq/topics (raw entries)": faq_topics(chatbot),
+            "/api/chat": chatbot.get_response("I need O+ blood urgently in Chennai"),
+            "/donor-match (all matches)": donors.find_donors("O+", "Chennai", "emergency", limit=None),
+            "/blood-availability (fallback)": availability,
+            "/blood-availability (200 scraped)": availability_scraped
+        }
+    finally:
+        blood_service.engine.close()
+
+
+def per_call(fn, payload, repeat: int) -> float:
+    fn(payload)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    print(f"{'payload':<36} {'bytes':>9} {'default us':>11} {'orjson us':>10} {'saved us':>9} {'speedup':>8}")
+    for label, payload in payloads().items():
+        assert json.loads(DEFAULT_RENDER(jsonable_encoder(payload))) == json.loads(FAST_RENDER(payload))
+        default = per_call(lambda p: DEFAULT_RENDER(jsonable_encoder(p)), payload, args.repeat)
+        fast = per_call(FAST_RENDER, payload, args.repeat)
+        print(
+            f"{label:<36} {len(FAST_RENDER(payload)):>9} {default * 1e6:>11.1f} {fast * 1e6:>10.1f} "
+            f"{(default - fast) * 1e6:>9.1f} {default / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
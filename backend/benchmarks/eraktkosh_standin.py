@@ -0,0 +1,227 @@
+"""Local stand-in for the eRaktKosh portal.
+
+Serves the endpoints the harvester and scraper use, either replaying
+recorded pages from a fixtures directory or generating synthetic ones:
+
+    /                                                     portal landing page
+    /BLDAHIMS/bloodbank/stateBloodBanks.cnt?stateCode=0    state dropdown
+    /BLDAHIMS/bloodbank/stateBloodBanks.cnt?stateCode=N    district dropdown
+    /BLDAHIMS/bloodbank/stockAvailability.cnt              landing page with token
+    /BLDAHIMS/bloodbank/stockAvailability.cnt?stateCode=N&districtCode=M&...
+                                                          stock result table
+    /BLDAHIMS/bloodbank/stockAvailability<i>.cnt           search form (linked from the portal)
+    /BLDAHIMS/bloodbank/searchStock.cnt (POST)             search form results
+
+Every response can be delayed (``--latency`` plus up to ``--jitter``
+seconds), a fraction can fail with 503 (``--error-rate``), and pages can be
+padded to a larger size (``--padding`` bytes). Request and byte counters
+are kept in ``StandInConfig.stats`` for benchmarks.
+
+A recorded page is looked up as ``<fixtures>/<path with / as _>[__<query>].html``
+with volatile parameters (the token, cache busters) dropped from the query.
+
+    cd backend && python -m benchmarks.eraktkosh_standin --port 8765 [--fixtures DIR]
+"""
+import argparse
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from benchmarks.pages import (
+    SAMPLE_GEOGRAPHY, make_options, make_portal_page, make_results_page, make_search_page,
+    make_stock_landing_page
+)
+
+STATES_PATH = "/BLDAHIMS/bloodbank/stateBloodBanks.cnt"
+STOCK_PATH = "/BLDAHIMS/bloodbank/stockAvailability.cnt"
+# The scraper lower-cases links it follows, so these match case-insensitively
+SEARCH_PAGE_PREFIX = "/bldahims/bloodbank/stockavailability"
+SEARCH_RESULTS_PATH = "/bldahims/bloodbank/searchstock.cnt"
+TOKEN = "standin0token"
+VOLATILE_PARAMS = {"abfhttf", "_"}
+
+
+def stable_seed(*parts) -> int:
+    """Page seed that, unlike hash(), is the same in every process"""
+    return zlib.crc32("|".join(str(part) for part in parts).encode("utf-8")) & 0xFFFF
+
+
+def fixture_name(path: str, query: str) -> str:
+    params = sorted((k, v) for k, v in parse_qsl(query) if k not in VOLATILE_PARAMS)
+    name = path.strip("/").replace("/", "_") or "index"
+    if params:
+        name += "__" + "_".join(f"{k}-{v}" for k, v in params)
+    return re.sub(r"[^A-Za-z0-9_.+-]", "-", name) + ".html"
+
+
+class StandInStats:
+    """Thread-safe request, error and byte counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.bytes_sent = 0
+
+    def record(self, status: int, size: int):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+            if status >= 500:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "bytes_sent": self.bytes_sent}
+
+
+class StandInConfig:
+    def __init__(self, fixtures: Optional[Path] = None, rows_per_district: int = 25,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 padding: int = 0, seed: int = 7):
+        self.fixtures = fixtures
+        self.rows_per_district = rows_per_district
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.padding = padding
+        self.stats = StandInStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    config = StandInConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str):
+        if status == 200 and self.config.padding:
+            body += f"<!-- {'x' * self.config.padding} -->"
+        payload = body.encode("utf-8")
+        self.config.stats.record(status, len(payload))
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The scraper cancels the losing probes once one link yields results
+            pass
+
+    def _recorded(self, path: str, query: str) -> Optional[str]:
+        if self.config.fixtures is None:
+            return None
+        fixture = self.config.fixtures / fixture_name(path, query)
+        return fixture.read_text(encoding="utf-8") if fixture.exists() else None
+
+    def _generated(self, path: str, params: dict) -> Optional[str]:
+        if path == "/":
+            return make_portal_page()
+
+        if path == STATES_PATH:
+            state_code = params.get("stateCode", "0")
+            if state_code == "0":
+                return make_options((code, name) for code, (name, _) in SAMPLE_GEOGRAPHY.items())
+            if state_code in SAMPLE_GEOGRAPHY:
+                districts = SAMPLE_GEOGRAPHY[state_code][1]
+                return make_options((str(i + 1), name) for i, name in enumerate(districts))
+            return make_options([])
+
+        if path == STOCK_PATH:
+            if "stateCode" not in params:
+                return make_stock_landing_page(TOKEN)
+            if params.get("abfhttf") != TOKEN:
+                return "<html><body>Session expired</body></html>"
+            _, districts = SAMPLE_GEOGRAPHY.get(params["stateCode"], ("", []))
+            index = int(params.get("districtCode", "0")) - 1
+            district = districts[index] if 0 <= index < len(districts) else "Unknown"
+            seed = stable_seed(params["stateCode"], params.get("districtCode"))
+            return make_results_page(self.config.rows_per_district, seed=seed, districts=[district])
+
+        if path.lower() == SEARCH_RESULTS_PATH:
+            if params.get("abfhttf") != TOKEN:
+                return "<html><body>Session expired</body></html>"
+            district = params.get("districtName") or "Unknown"
+            seed = stable_seed(params.get("stateCode"), district.lower())
+            return make_results_page(self.config.rows_per_district, seed=seed, districts=[district])
+
+        if path.lower().startswith(SEARCH_PAGE_PREFIX):
+            return make_search_page(TOKEN)
+
+        return None
+
+    def _handle(self, form: str = ""):
+        config = self.config
+        if config.latency or config.jitter:
+            time.sleep(config.latency + config.jitter * config.random())
+        if config.error_rate and config.random() < config.error_rate:
+            self._send(503, "<html><body>Service Unavailable</body></html>")
+            return
+
+        parts = urlsplit(self.path)
+        body = self._recorded(parts.path, parts.query)
+        if body is None:
+            params = dict(parse_qsl(parts.query))
+            params.update(parse_qsl(form))
+            body = self._generated(parts.path, params)
+        if body is None:
+            self._send(404, "<html><body>Not found</body></html>")
+        else:
+            self._send(200, body)
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        form = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._handle(form.decode("utf-8", "replace"))
+
+
+def serve(port: int = 0, config: Optional[StandInConfig] = None) -> ThreadingHTTPServer:
+    """Start the stand-in on a background thread; port 0 picks a free port"""
+    handler = type("ConfiguredStandInHandler", (StandInHandler,), {"config": config or StandInConfig()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="eraktkosh-standin", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", type=Path, help="directory of recorded pages to replay")
+    parser.add_argument("--rows", type=int, default=25, help="generated result rows per district")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--padding", type=int, default=0, help="bytes of filler appended to every page")
+    args = parser.parse_args()
+
+    config = StandInConfig(args.fixtures, args.rows, args.latency, args.jitter, args.error_rate, args.padding)
+    server = serve(args.port, config)
+    print(f"eRaktKosh stand-in listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Synthetic eRaktKosh-style pages for offline benchmarks"""
+import random
+from typing import List, Optional
+
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"]
+COMPONENTS = ["Whole Blood", "Packed Red Blood Cells", "Fresh Frozen Plasma", "Platelet Concentrate", "Cryoprecipitate"]
+
+PAGE_CHROME = """
+<div id="header"><ul class="nav">{nav}</ul></div>
+<script src="/BLDAHIMS/js/jquery.min.js"></script>
+<script>
+$(document).ready(function() {{
+    $.ajax({{url: "/BLDAHIMS/bloodbank/nearbyBB.cnt", data: {{hmode: "GETDISTRICTLIST"}}}});
+}});
+</script>
+<div id="sidebar">{sidebar}</div>
+"""
+
+
+def _chrome(rng: random.Random) -> str:
+    nav = "".join(f'<li><a href="/BLDAHIMS/page{i}.cnt">Menu item {i}</a></li>' for i in range(60))
+    sidebar = "".join(
+        f"<p>Notice {i}: <span>{'Voluntary blood donation saves lives. ' * rng.randint(1, 4)}</span></p>"
+        for i in range(80)
+    )
+    return PAGE_CHROME.format(nav=nav, sidebar=sidebar)
+
+
+def make_results_page(rows: int, seed: int = 7, districts: Optional[List[str]] = None) -> str:
+    """A stock-availability result page with ``rows`` blood bank rows plus portal chrome"""
+    rng = random.Random(seed)
+    districts = districts or ["Chennai", "Madurai", "Coimbatore", "Salem", "Trichy"]
+    body = []
+    for i in range(rows):
+        stock = ", ".join(f"{bg}:{rng.randint(0, 40)}" for bg in BLOOD_GROUPS)
+        body.append(
+            "<tr>"
+            f"<td>{i + 1}</td>"
+            f"<td><b>Blood Bank {i}</b><br/>Government Hospital, {rng.choice(districts)}</td>"
+            f"<td>{rng.choice(['Govt', 'Private', 'Charitable'])}</td>"
+            f"<td>{stock}</td>"
+            f"<td>{rng.choice(COMPONENTS)}</td>"
+            f"<td>2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} 10:{rng.randint(10, 59)}</td>"
+            "</tr>"
+        )
+    table = (
+        '<table class="table" id="stockTable">'
+        "<tr><th>S.No.</th><th>Blood Bank</th><th>Category</th><th>Availability</th>"
+        "<th>Component</th><th>Last Updated</th></tr>"
+        + "".join(body)
+        + "</table>"
+    )
+    return f"<html><head><title>eRaktKosh</title></head><body>{_chrome(rng)}{table}</body></html>"
+
+
+def make_portal_page(links: int = 5, seed: int = 7) -> str:
+    """A portal landing page with ``links`` stock/availability links, a state select and scripts"""
+    rng = random.Random(seed)
+    link_html = "".join(
+        f'<a href="/BLDAHIMS/bloodbank/stockAvailability{i}.cnt">Blood Stock Availability {i}</a>'
+        for i in range(links)
+    )
+    select = '<select id="stateCode" name="stateCode">' + "".join(
+        f'<option value="{code}">State {code}</option>' for code in range(1, 37)
+    ) + "</select>"
+    return f"<html><body>{_chrome(rng)}{link_html}<form action='search.cnt'>{select}</form></body></html>"
+
+
+# State code -> (state name, districts), mirroring the portal's dropdown codes
+SAMPLE_GEOGRAPHY = {
+    "33": ("Tamil Nadu", ["Chennai", "Coimbatore", "Madurai", "Salem", "Tiruchirappalli"]),
+    "29": ("Karnataka", ["Bengaluru Urban", "Mysuru"]),
+    "32": ("Kerala", ["Ernakulam", "Thiruvananthapuram", "Kozhikode"]),
+    "27": ("Maharashtra", ["Mumbai", "Pune"]),
+    "7": ("Delhi", ["New Delhi"])
+}
+
+
+def make_options(options, placeholder: str = "--Select--") -> str:
+    """A dropdown fragment as returned by stateBloodBanks.cnt"""
+    return f'<option value="-1">{placeholder}</option>' + "".join(
+        f'<option value="{code}">{name}</option>' for code, name in options
+    )
+
+
+def make_search_page(token: str, action: str = "searchStock.cnt") -> str:
+    """A stock search page whose form posts state, district, blood group and component"""
+    states = "".join(f'<option value="{code}">{name}</option>' for code, (name, _) in SAMPLE_GEOGRAPHY.items())
+    groups = "".join(f'<option value="{bg}">{bg}</option>' for bg in BLOOD_GROUPS)
+    components = "".join(f'<option value="{c}">{c}</option>' for c in COMPONENTS)
+    return (
+        "<html><body>"
+        f'<form method="post" action="{action}">'
+        f'<input type="hidden" name="abfhttf" value="{token}"/>'
+        f'<select name="stateCode">{states}</select>'
+        '<input type="text" name="districtName"/>'
+        f'<select name="bloodGroup">{groups}</select>'
+        f'<select name="componentType">{components}</select>'
+        "</form></body></html>"
+    )
+
+
+def make_stock_landing_page(token: str) -> str:
+    """The stockAvailability.cnt landing page carrying the abfhttf token"""
+    return (
+        "<html><body><script>"
+        f'var stockUrl = "/BLDAHIMS/bloodbank/stockAvailability.cnt?abfhttf={token}";'
+        "</script><div id='stock'></div></body></html>"
+    )
@@ -0,0 +1,81 @@
+from datetime import date
+
+import pytest
+
+from app.services.utils.donor_index import DonorIndex
+from app.services.utils.donor_stats import DonorStatistics
+from app.services.utils.donor_table import DonorTable
+
+DONORS = {
+    1: "Chennai, Tamil Nadu",
+    2: "Anna Nagar, Chennai, Tamil Nadu",
+    3: "Navi Mumbai, Maharashtra",
+    4: "Mumbai, Maharashtra",
+    5: "Chengalpattu, Tamil Nadu"
+}
+
+
+def donor(location, status="available"):
+    return {
+        "blood_group": "O+",
+        "location": location,
+        "status": status,
+        "eligible_next": "2024-01-01",
+        "verified": True,
+        "donation_count": 0
+    }
+
+
+@pytest.fixture
+def searches():
+    index, table = DonorIndex(), DonorTable()
+    for key, location in DONORS.items():
+        index.add(key, donor(location))
+        table.upsert(key, donor(location))
+
+    def search(location):
+        keys = index.candidates(["O+"], location, "normal", date.today())
+        rows = table.match("O+", location, "normal", date.today())
+        assert set(table.rows_for(keys).tolist()) == set(rows.tolist())
+        return keys
+
+    return search
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("Chennai", {1, 2}),
+    ("Chen", {1, 2, 5}),
+    ("Anna Nagar", {2}),
+    ("Mumbai", {3, 4}),
+    ("Navi Mumbai", {3}),
+    ("Tamil", {1, 2, 5}),
+    ("Nadu", {1, 2, 5}),
+    ("ennai", set()),
+    ("Pune", set())
+])
+def test_location_terms_match_by_word_prefix(searches, location, expected):
+    assert searches(location) == expected
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("Chen", 3),
+    ("Mumbai", 2),
+    ("Chennai, Tamil Nadu", 3),
+    ("Pune", 0)
+])
+def test_statistics_count_each_donor_once(location, expected):
+    statistics = DonorStatistics()
+    for location_name in DONORS.values():
+        statistics.add(donor(location_name))
+    assert statistics.snapshot(location)["total_donors"] == expected
+
+
+def test_statistics_drop_places_without_donors():
+    statistics = DonorStatistics()
+    old = donor("Chengalpattu, Tamil Nadu")
+    statistics.add(old)
+    statistics.replace(old, donor("Chennai, Tamil Nadu"))
+
+    assert "chengalpattu" not in statistics._terms
+    assert ("chengalpattu", "tamil nadu") not in statistics._term_places["tamil nadu"]
+    assert statistics.snapshot("Chen")["coverage_areas"] == ["Chennai, Tamil Nadu"]
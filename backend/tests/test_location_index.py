@@ -0,0 +1,35 @@
+import pytest
+
+from app.services.utils.fallback_data import FALLBACK_BLOOD_BANKS, LOCATION_ALIASES
+from app.services.utils.location_index import LocationIndex
+
+location_index = LocationIndex(FALLBACK_BLOOD_BANKS, LOCATION_ALIASES)
+
+
+@pytest.mark.parametrize("state", ["Uttar Pradesh", "Madhya Pradesh", "Himachal Pradesh", "Arunachal Pradesh", "Pradesh"])
+def test_generic_token_does_not_resolve_another_state(state):
+    assert location_index.resolve_state(state) == []
+
+
+@pytest.mark.parametrize("state", ["Andra Pradesh", "Andhra Pradsh", "Andhra", "AP"])
+def test_andhra_pradesh_variants_resolve(state):
+    assert location_index.resolve_state(state)[0][0] == "Andhra Pradesh"
+
+
+@pytest.mark.parametrize("state, expected", [
+    ("Tamilnadu", "Tamil Nadu"),
+    ("Karnatka", "Karnataka"),
+    ("Maharashtr", "Maharashtra"),
+    ("Kerela", "Kerala")
+])
+def test_misspelled_states_resolve(state, expected):
+    assert location_index.resolve_state(state)[0][0] == expected
+
+
+@pytest.mark.parametrize("district, expected", [
+    ("Chenai", "Chennai"),
+    ("Coimbatur", "Coimbatore"),
+    ("Tiruchi", "Trichy")
+])
+def test_misspelled_districts_resolve(district, expected):
+    assert location_index.resolve_district("Tamil Nadu", district)[0][0] == expected